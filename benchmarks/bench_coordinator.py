@@ -0,0 +1,37 @@
+"""Benchmarks of the coordinator update path and entity state writes."""
+
+import random
+
+from homeassistant.const import EVENT_STATE_CHANGED
+
+from custom_components.conneqtech.const import DOMAIN
+from fake_server import make_changes
+
+
+async def bench_update_data(hass, setup_fleet, benchmark):
+    """Apply stream events to a coordinator with all its entities."""
+    coordinator = hass.data[DOMAIN][setup_fleet[0].entry_id].coordinator
+    rng = random.Random(1)
+    events = [make_changes(rng) for _ in range(1000)]
+    it = iter(events * 1000)
+
+    benchmark(lambda: coordinator.update_data(next(it)))
+    benchmark.extra_info["changes_dropped"] = coordinator.stats.changes_dropped
+    benchmark.extra_info["state_writes_saved"] = coordinator.stats.state_writes_saved
+
+
+async def bench_state_writes_per_event(hass, setup_fleet, benchmark):
+    """Count state writes caused by one location event."""
+    coordinator = hass.data[DOMAIN][setup_fleet[0].entry_id].coordinator
+    rng = random.Random(2)
+    writes = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, writes.append)
+    events = 200
+
+    def run():
+        for _ in range(events):
+            coordinator.update_data(make_changes(rng))
+
+    benchmark.pedantic(run, rounds=1)
+    await hass.async_block_till_done()
+    benchmark.extra_info["state_writes_per_event"] = len(writes) / events
@@ -0,0 +1,86 @@
+"""Import time of the integration, measured in a fresh interpreter."""
+
+from pathlib import Path
+import subprocess
+import sys
+
+PACKAGE = "custom_components.conneqtech"
+ROOT = Path(__file__).parents[1]
+# Home Assistant modules that are loaded before any integration.
+PRELOAD = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.update_coordinator",
+    "aiohttp",
+)
+# Milliseconds the integration may add to the start of Home Assistant.
+IMPORT_BUDGET_MS = 100
+CONFIG_FLOW_BUDGET_MS = 30
+# Only needed once an entry is set up.
+RUNTIME = (
+    f"{PACKAGE}.conneqtechapi",
+    f"{PACKAGE}.stream",
+    f"{PACKAGE}.device",
+    "aiohttp_sse_client2",
+    f"{PACKAGE}.record",
+    f"{PACKAGE}.statistics",
+    f"{PACKAGE}.geofence",
+    "homeassistant.components.recorder",
+)
+
+
+def _import_time(module: str, deferred: tuple[str, ...] = RUNTIME) -> tuple[float, dict[str, float], set[str]]:
+    """Return the cumulative import time in ms, the self time per module and
+    the deferred modules that got imported anyway."""
+    code = (
+        "import sys\n"
+        + "".join(f"import {preload}\n" for preload in PRELOAD)
+        + f"import {module}\n"
+        + f"print(','.join(m for m in {deferred!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    self_times: dict[str, float] = {}
+    cumulative = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (
+            part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():
+            continue
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+        self_times[name.strip()] = int(self_us) / 1000
+    loaded = {name for name in result.stdout.strip().split(",") if name}
+    return cumulative, self_times, loaded
+
+
+def _bench(benchmark, module: str, budget: float) -> None:
+    results = []
+
+    def run():
+        results.append(_import_time(module))
+
+    benchmark.pedantic(run, rounds=5)
+    cumulative, self_times, loaded = min(results, key=lambda result: result[0])
+    benchmark.extra_info["import_ms"] = cumulative
+    benchmark.extra_info["budget_ms"] = budget
+    benchmark.extra_info["slowest_modules_ms"] = dict(sorted(
+        self_times.items(), key=lambda item: item[1], reverse=True)[:10])
+    assert not loaded, f"{module} imports {loaded} at load time"
+    assert cumulative <= budget, f"{module} took {cumulative:.1f} ms"
+
+
+def bench_import_integration(benchmark):
+    """Import the integration like Home Assistant does at start."""
+    _bench(benchmark, PACKAGE, IMPORT_BUDGET_MS)
+
+
+def bench_import_config_flow(benchmark):
+    """Import the config flow, which should not load the runtime path."""
+    _bench(benchmark, f"{PACKAGE}.config_flow", CONFIG_FLOW_BUDGET_MS)
@@ -0,0 +1,26 @@
+"""Memory used per tracker."""
+
+import random
+import tracemalloc
+
+from custom_components.conneqtech.device import ConneqtechDevice
+from fake_server import make_changes, make_device
+
+
+def bench_memory_per_tracker(benchmark):
+    """Measure the memory of device models after a stream of changes."""
+    trackers = 1000
+    rng = random.Random(3)
+
+    def run():
+        tracemalloc.start()
+        devices = [ConneqtechDevice(make_device(str(i))) for i in range(trackers)]
+        for device in devices:
+            for _ in range(10):
+                device.apply_changes(make_changes(rng))
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size
+
+    size = benchmark.pedantic(run, rounds=3)
+    benchmark.extra_info["bytes_per_tracker"] = size / trackers
@@ -0,0 +1,29 @@
+"""Benchmarks of key path reads and writes."""
+
+from custom_components.conneqtech.const import get_nested_value, set_nested_value
+from custom_components.conneqtech.device import ConneqtechDevice
+from custom_components.conneqtech.paths import compile_path
+from fake_server import make_device
+
+KEY = "payload_state.tracker.metric.rssi"
+
+
+def bench_get_nested_value(benchmark):
+    raw = make_device("1")
+    assert benchmark(get_nested_value, raw, KEY) == -70
+
+
+def bench_compiled_get(benchmark):
+    raw = make_device("1")
+    assert benchmark(compile_path(KEY).get, raw) == -70
+
+
+def bench_set_nested_value(benchmark):
+    raw = make_device("1")
+    benchmark(set_nested_value, raw, KEY, -71)
+    assert raw["payload_state"]["tracker"]["metric"]["rssi"] == -71
+
+
+def bench_device_typed_read(benchmark):
+    device = ConneqtechDevice(make_device("1"))
+    assert benchmark(device.get, compile_path(KEY)) == -70
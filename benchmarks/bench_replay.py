@@ -0,0 +1,27 @@
+"""Replay of recorded stream traffic through the ingest pipeline."""
+
+import os
+import time
+
+import pytest
+
+from custom_components.conneqtech.const import DATA_STREAMS
+
+RECORDING = os.environ.get("CONNEQTECH_RECORDING")
+
+
+@pytest.mark.skipif(RECORDING is None, reason="set CONNEQTECH_RECORDING to a recording")
+async def bench_replay(hass, setup_fleet, benchmark):
+    """Replay a recording at maximum speed."""
+    manager = hass.data[DATA_STREAMS]["bench"]
+    start = time.perf_counter()
+    # Returns once the consumer of the replay applied every queued change.
+    sink = await manager.async_replay(RECORDING, 0)
+    elapsed = time.perf_counter() - start
+    count = sink.metrics.events.total
+
+    benchmark.pedantic(lambda: None, rounds=1)
+    benchmark.extra_info["events"] = count
+    benchmark.extra_info["events_per_second"] = count / elapsed
+    benchmark.extra_info["changes_applied"] = sink.applied
+    benchmark.extra_info["coalesced"] = sink.queue.coalesced
@@ -0,0 +1,27 @@
+"""End to end throughput from the fake stream into the coordinators."""
+
+import asyncio
+import time
+
+import pytest
+
+from custom_components.conneqtech.const import DATA_STREAMS
+
+
+@pytest.mark.parametrize("fleet_size", [1, 10, 50])
+async def bench_stream_throughput(hass, fake_api, setup_fleet, max_events, benchmark):
+    """Measure events per second through the whole ingest pipeline."""
+    manager = hass.data[DATA_STREAMS]["bench"]
+    start = time.perf_counter()
+    while manager.metrics.events.total < max_events:
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 60, "stream stalled"
+    while manager.queue.depth:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    # The pipeline is async, record the measured run as a single round.
+    benchmark.pedantic(lambda: None, rounds=1)
+    benchmark.extra_info["events_per_second"] = max_events / elapsed
+    benchmark.extra_info["coalesced"] = manager.queue.coalesced
+    benchmark.extra_info["decode_mean_ms"] = manager.metrics.decode_latency.mean
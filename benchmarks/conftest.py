@@ -0,0 +1,74 @@
+"""Fixtures for the Conneqtech benchmarks."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+from aiohttp.test_utils import TestServer
+from homeassistant.setup import async_setup_component
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+from custom_components.conneqtech.const import CONF_DEVICE_ID, DOMAIN  # noqa: E402
+from fake_server import FakeConneqtech  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+def fleet_size() -> int:
+    return 10
+
+
+@pytest.fixture
+def events_per_second() -> float:
+    return 0
+
+
+@pytest.fixture
+def max_events() -> int | None:
+    return 2000
+
+
+@pytest.fixture
+async def fake_api(socket_enabled, fleet_size, events_per_second, max_events):
+    """Run the fake API and point the integration at it."""
+    fake = FakeConneqtech(fleet_size, events_per_second, max_events)
+    server = TestServer(fake.app)
+    await server.start_server()
+    base_url = str(server.make_url("")).rstrip("/")
+    with patch("custom_components.conneqtech.conneqtechapi.API_BASE_URL", base_url):
+        fake.base_url = base_url
+        yield fake
+    await server.close()
+
+
+@pytest.fixture
+async def setup_fleet(hass, fake_api):
+    """Set up one config entry per device of the fake fleet."""
+    entries = []
+    for imei in fake_api.imeis:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            unique_id=f"conneqtech-{imei}",
+            data={"client_id": "bench", "client_secret": "secret",
+                  CONF_DEVICE_ID: imei},
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    # Setting up the integration sets up all of its entries.
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    yield entries
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,102 @@
+"""Local stand-in for api.iot.conneq.tech used by the benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+
+def make_device(imei: str) -> dict[str, Any]:
+    """Return a REST snapshot shaped like the real API."""
+    return {
+        "imei": imei,
+        "device_type": "bike",
+        "params": {},
+        "payload_state": {
+            "dts": "2024-05-01T12:00:00+00:00",
+            "tracker": {
+                "loc": {
+                    "geo": {"type": "Point", "coordinates": [5.1214, 52.0907]},
+                    "sp": 0,
+                    "ang": 0,
+                    "alt": 5,
+                    "dtg": "2024-05-01T12:00:00+00:00",
+                },
+                "metric": {"bbatp": 90, "bbatv": 4.1, "rssi": -70},
+                "config": {"fwver": "1.2.3"},
+            },
+            "device": {"metric": {"bmv": 36.5}},
+        },
+    }
+
+
+def make_changes(rng: random.Random) -> dict[str, Any]:
+    """Return the changes of a location event while riding."""
+    return {
+        "payload_state.dts": "2024-05-01T12:00:01+00:00",
+        "payload_state.tracker.loc.geo.coordinates": [
+            5.1214 + rng.uniform(-0.01, 0.01), 52.0907 + rng.uniform(-0.01, 0.01)],
+        "payload_state.tracker.loc.sp": rng.randint(0, 30),
+        "payload_state.tracker.loc.ang": rng.randint(0, 359),
+        "payload_state.tracker.loc.alt": rng.randint(0, 20),
+        "payload_state.tracker.loc.dtg": "2024-05-01T12:00:01+00:00",
+        "payload_state.tracker.metric.rssi": rng.randint(-90, -60),
+    }
+
+
+class FakeConneqtech:
+    """Serve device snapshots and a stream of updated events.
+
+    The stream sends events_per_second events spread over the requested
+    IMEIs, or max_events events as fast as possible when the rate is 0.
+    """
+
+    def __init__(self, fleet_size: int = 10, events_per_second: float = 0, max_events: int | None = None, seed: int = 1) -> None:
+        self.imeis = [str(860000000000000 + i) for i in range(fleet_size)]
+        self.events_per_second = events_per_second
+        self.max_events = max_events
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.app = web.Application()
+        self.app.router.add_get("/v2/device", self._handle_query)
+        self.app.router.add_get("/v2/device/{imei}", self._handle_device)
+        self.app.router.add_get("/v2/es/device", self._handle_stream)
+
+    async def _handle_query(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        limit = int(request.query.get("limit", 100))
+        return web.json_response([make_device(i) for i in self.imeis[:limit]])
+
+    async def _handle_device(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        imei = request.match_info["imei"]
+        if imei not in self.imeis:
+            raise web.HTTPNotFound()
+        return web.json_response(make_device(imei))
+
+    async def _handle_stream(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        imeis = request.query.get("imeis", "").split(",")
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        delay = 1 / self.events_per_second if self.events_per_second else 0
+        event_id = int(request.headers.get("Last-Event-ID") or 0)
+        while self.max_events is None or event_id < self.max_events:
+            event_id += 1
+            data = json.dumps({
+                "type": "updated",
+                "imei": self.rng.choice(imeis),
+                "changes": make_changes(self.rng),
+            })
+            await response.write(f"id: {event_id}\ndata: {data}\n\n".encode())
+            await asyncio.sleep(delay)
+        return response
+
+
+if __name__ == "__main__":
+    web.run_app(FakeConneqtech(fleet_size=50, events_per_second=20).app, port=8765)
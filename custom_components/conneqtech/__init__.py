@@ -1,15 +1,63 @@
 """Conneqtech IOT integration."""
 
-from .conneqtechapi import ConneqtechApi, Coordinator
-from .const import DOMAIN, LOGGER, PLATFORMS, CONF_DEVICE_ID
+from __future__ import annotations
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    PLATFORMS,
+    CONF_DEVICE_ID,
+    CONF_GEOFENCES,
+    CONF_STATISTICS,
+    CONF_TRIP_IDLE_TIME,
+    CONF_TRIP_MIN_SPEED,
+    DEFAULT_STATISTICS,
+    DEFAULT_TRIP_IDLE_TIME,
+    DEFAULT_TRIP_MIN_SPEED,
+)
+from .services import async_setup_services
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.importlib import async_import_module
+from homeassistant.helpers.typing import ConfigType
+from aiohttp import ClientError, ClientResponseError
 
 from dataclasses import dataclass
+from functools import partial
 
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .conneqtechapi import Coordinator
+    from .drain import BatteryDrain
+    from .geofence import GeofenceMonitor
+    from .odometer import Odometer
+    from .statistics import StatisticsAggregator
+    from .track import TrackBuffer
+    from .trip import TripDetector
+
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Loaded on the first setup, so loading the integration and its config flow
+# stays cheap.
+RUNTIME_MODULES = (
+    "account",
+    "conneqtechapi",
+    "device",
+    "drain",
+    "odometer",
+    "session",
+    "storage",
+    "stream",
+    "track",
+    "trip",
+)
 
 
 @dataclass
@@ -18,44 +66,169 @@ class RuntimeData:
 
     coordinator: DataUpdateCoordinator
     cancel_update_listener: Callable
+    trips: TripDetector
+    odometer: Odometer
+    battery_drain: BatteryDrain
+    track: TrackBuffer
+    geofences: GeofenceMonitor | None
+    statistics: StatisticsAggregator | None
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Conneqtech services."""
+    async_setup_services(hass)
+    return True
+
+
+async def _async_import_runtime(hass: HomeAssistant, *modules: str) -> None:
+    """Import runtime modules in the executor, not on the event loop."""
+    for module in modules:
+        await async_import_module(hass, f"{__name__}.{module}")
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the Conneqtech IOT platform."""
+    await _async_import_runtime(hass, *RUNTIME_MODULES)
+    from .account import async_get_account
+    from .conneqtechapi import ConneqtechApi, Coordinator
+    from .device import ConneqtechDevice
+    from .drain import BatteryDrain
+    from .odometer import Odometer
+    from .session import async_acquire_session, async_release_session
+    from .storage import ConneqtechStore
+    from .stream import async_get_stream_manager
+    from .track import TrackBuffer
+    from .trip import TripDetector
+
     hass.data.setdefault(DOMAIN, {})
     LOGGER.debug(f"Setting up Conneqtech IOT platform for {DOMAIN}")
 
     device_id = entry.data.get(CONF_DEVICE_ID)
 
+    # Registered first so the session is released after everything using it.
+    session = async_acquire_session(hass)
+    entry.async_on_unload(partial(async_release_session, hass))
+
     conneqtechApi = ConneqtechApi(
         hass,
         client_id=entry.data.get("client_id"),
         client_secret=entry.data.get("client_secret"),
         device_id=device_id,
+        session=session,
     )
-    await conneqtechApi.async_init()
 
-    coordinator = Coordinator(hass, entry, conneqtechApi)
-    await coordinator.async_config_entry_first_refresh()
+    # Credentials and snapshots are fetched once per account.
+    account = async_get_account(hass, conneqtechApi)
+    entry.async_on_unload(account.async_release)
+    coordinator = Coordinator(hass, entry, conneqtechApi, account)
+    store = ConneqtechStore(hass, entry.entry_id)
+    if (snapshot := await store.async_load()) is None:
+        try:
+            await account.async_validate()
+        except ClientResponseError as e:
+            if e.status in (401, 403):
+                raise ConfigEntryAuthFailed(e) from e
+            raise ConfigEntryNotReady(e) from e
+        except (ClientError, TimeoutError) as e:
+            raise ConfigEntryNotReady(e) from e
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Restore the entities right away, the cloud is checked afterwards.
+        coordinator.async_set_updated_data(
+            ConneqtechDevice(snapshot["device"]))
+        entry.async_create_background_task(
+            hass,
+            _async_validate_and_refresh(hass, entry, coordinator),
+            name="Conneqtech IOT refresh",
+        )
+    entry.async_on_unload(coordinator.async_shutdown)
     cancel_update_listener = entry.add_update_listener(_async_update_listener)
 
+    # Trips are derived from the location changes as they come in.
+    trips = TripDetector(
+        hass,
+        device_id,
+        entry.options.get(CONF_TRIP_MIN_SPEED, DEFAULT_TRIP_MIN_SPEED),
+        entry.options.get(CONF_TRIP_IDLE_TIME, DEFAULT_TRIP_IDLE_TIME),
+        coordinator.async_publish,
+    )
+    entry.async_on_unload(trips.async_cancel)
+    entry.async_on_unload(coordinator.async_add_processor(trips.async_process))
+
+    # Running totals are kept on ingest and saved with the snapshot.
+    odometer = Odometer()
+    battery_drain = BatteryDrain()
+    if snapshot is not None:
+        odometer.restore(snapshot.get("odometer"))
+        battery_drain.restore(snapshot.get("battery_drain"))
+    entry.async_on_unload(
+        coordinator.async_add_processor(odometer.async_process))
+    entry.async_on_unload(
+        coordinator.async_add_processor(battery_drain.async_process))
+    track = TrackBuffer()
+    entry.async_on_unload(coordinator.async_add_processor(track.async_process))
+    # The index is built once, every location change is a grid lookup.
+    geofences = None
+    if fence_config := entry.options.get(CONF_GEOFENCES):
+        await _async_import_runtime(hass, "geofence")
+        from .geofence import GeofenceIndex, GeofenceMonitor, parse_geofences
+
+        geofences = GeofenceMonitor(
+            hass, device_id, GeofenceIndex(parse_geofences(fence_config)))
+        entry.async_on_unload(
+            coordinator.async_add_processor(geofences.async_process))
+        geofences.async_process(coordinator.data, None)
+
+    statistics = None
+    if entry.options.get(CONF_STATISTICS, DEFAULT_STATISTICS):
+        # Loads the recorder models, only done when the option is on.
+        await _async_import_runtime(hass, "statistics")
+        from .statistics import StatisticsAggregator
+
+        statistics = StatisticsAggregator(hass, device_id)
+        statistics.async_start()
+        entry.async_on_unload(statistics.async_stop)
+        entry.async_on_unload(
+            coordinator.async_add_processor(statistics.async_process))
+
+    entry.async_on_unload(store.async_track(coordinator, {
+        "odometer": odometer.as_dict,
+        "battery_drain": battery_drain.as_dict,
+    }))
+
     if entry.unique_id is None:
         hass.config_entries.async_update_entry(
             entry, unique_id=f"conneqtech-{device_id}")
 
     hass.data[DOMAIN][entry.entry_id] = RuntimeData(
-        coordinator, cancel_update_listener)
+        coordinator, cancel_update_listener, trips, odometer, battery_drain,
+        track, geofences, statistics)
 
-    entry.async_create_background_task(
-        hass,
-        coordinator.async_connect(),
-        name="Conneqtech IOT connection"
-    )
+    # Devices of the same account share their event stream connection.
+    stream_manager = async_get_stream_manager(hass, conneqtechApi)
+    entry.async_on_unload(
+        stream_manager.async_add_device(device_id, coordinator))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
+async def _async_validate_and_refresh(hass: HomeAssistant, entry: ConfigEntry, coordinator: Coordinator) -> None:
+    """Check the credentials and replace the restored snapshot."""
+    try:
+        await coordinator.account.async_validate()
+        coordinator.async_set_updated_data(
+            await coordinator.async_update_device())
+    except ClientResponseError as e:
+        if e.status in (401, 403):
+            coordinator.account.async_invalidate()
+            entry.async_start_reauth(hass)
+            return
+        LOGGER.warning(f"Keeping cached state of {entry.title}: {e}")
+    except Exception as e:
+        LOGGER.warning(f"Keeping cached state of {entry.title}: {e}")
+
+
 async def _async_update_listener(hass: HomeAssistant, config_entry):
     """Handle config options update."""
     # Reload the integration when the options change.
@@ -69,3 +242,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the saved snapshot of a removed entry."""
+    await _async_import_runtime(hass, "storage")
+    from .storage import ConneqtechStore
+
+    await ConneqtechStore(hass, entry.entry_id).async_remove()
@@ -0,0 +1,140 @@
+"""Account level bootstrap for Conneqtech devices."""
+
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    BOOTSTRAP_CONCURRENCY,
+    BOOTSTRAP_RESULT_TTL,
+    CONF_CLIENT_ID,
+    CONF_DEVICE_ID,
+    DATA_ACCOUNTS,
+    DOMAIN,
+    LOGGER,
+)
+from .conneqtechapi import ConneqtechApi
+from .device import ConneqtechDevice
+
+
+@callback
+def async_get_account(hass: HomeAssistant, api: ConneqtechApi) -> ConneqtechAccount:
+    """Return the bootstrap shared by all devices of an account.
+
+    The account must be released on unload. It is forgotten with the last
+    entry, as its api uses the shared session that is closed then.
+    """
+    accounts: dict[str, ConneqtechAccount] = hass.data.setdefault(
+        DATA_ACCOUNTS, {})
+    if (account := accounts.get(api.client_id)) is None:
+        account = accounts[api.client_id] = ConneqtechAccount(hass, api)
+    account.users += 1
+    return account
+
+
+class ConneqtechAccount:
+    """Validate credentials and fetch device snapshots once per account.
+
+    When Home Assistant sets up many entries of the same account at once,
+    the first device request fetches the snapshots of all entries that are
+    being set up, with at most BOOTSTRAP_CONCURRENCY requests in flight.
+    The other entries pick their snapshot from that batch.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: ConneqtechApi) -> None:
+        self.hass = hass
+        self.api = api
+        self._semaphore = asyncio.Semaphore(BOOTSTRAP_CONCURRENCY)
+        self._validate_task: asyncio.Task | None = None
+        self._validated = False
+        self._fetches: dict[str, asyncio.Task[ConneqtechDevice]] = {}
+        self._cancel_expires: set[CALLBACK_TYPE] = set()
+        self.users = 0
+
+    async def async_validate(self) -> None:
+        """Check the credentials, once for all devices of the account."""
+        if self._validated:
+            return
+        if self._validate_task is None:
+            self._validate_task = self.hass.async_create_task(
+                self.api.async_init(), f"Conneqtech IOT validate {self.api.client_id}")
+        try:
+            await asyncio.shield(self._validate_task)
+        except Exception:
+            # Let the next entry try again.
+            self._validate_task = None
+            raise
+        self._validated = True
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Forget validated credentials, for example after an auth error."""
+        self._validated = False
+        self._validate_task = None
+
+    @callback
+    def async_release(self) -> None:
+        """Release the account, forgetting it when it is no longer used."""
+        self.users -= 1
+        if self.users > 0:
+            return
+        self.async_invalidate()
+        for task in self._fetches.values():
+            task.cancel()
+        self._fetches.clear()
+        for cancel_expire in self._cancel_expires:
+            cancel_expire()
+        self._cancel_expires.clear()
+        accounts = self.hass.data.get(DATA_ACCOUNTS, {})
+        if accounts.get(self.api.client_id) is self:
+            del accounts[self.api.client_id]
+
+    async def async_get_device(self, imei: str) -> ConneqtechDevice:
+        """Return the snapshot of a device, batching startup requests."""
+        if (task := self._fetches.pop(imei, None)) is None:
+            self._async_prefetch(imei)
+            task = self._fetches.pop(imei)
+        return await task
+
+    @callback
+    def _async_prefetch(self, imei: str) -> None:
+        """Fetch the requested device and every device being set up."""
+        imeis = {imei}
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if (
+                entry.state is ConfigEntryState.SETUP_IN_PROGRESS
+                and entry.data.get(CONF_CLIENT_ID) == self.api.client_id
+                and (device_id := entry.data.get(CONF_DEVICE_ID)) not in self._fetches
+            ):
+                imeis.add(device_id)
+        if len(imeis) > 1:
+            LOGGER.debug(
+                f"Fetching {len(imeis)} devices for {self.api.client_id}")
+
+        tasks = {
+            device_id: self.hass.async_create_task(
+                self._async_fetch(device_id), f"Conneqtech IOT fetch {device_id}")
+            for device_id in imeis
+        }
+        self._fetches.update(tasks)
+
+        @callback
+        def expire(_now) -> None:
+            """Drop snapshots nobody asked for."""
+            self._cancel_expires.discard(cancel_expire)
+            for device_id, task in tasks.items():
+                if self._fetches.get(device_id) is task:
+                    del self._fetches[device_id]
+                    task.cancel()
+
+        cancel_expire = async_call_later(
+            self.hass, BOOTSTRAP_RESULT_TTL, expire)
+        self._cancel_expires.add(cancel_expire)
+
+    async def _async_fetch(self, imei: str) -> ConneqtechDevice:
+        async with self._semaphore:
+            return await self.api.async_get_device(imei)
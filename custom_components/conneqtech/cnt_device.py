@@ -1,10 +1,28 @@
+"""Base entity for Conneqtech devices."""
 
-from .const import DOMAIN
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .const import (
+    DOMAIN,
+    CONF_LOCATION_DISTANCE,
+    CONF_LOCATION_INTERVAL,
+    DEFAULT_LOCATION_DISTANCE,
+    DEFAULT_LOCATION_INTERVAL,
+)
+from .throttle import LocationThrottle, StateThrottle
+
 
 class CntDevice(CoordinatorEntity):
     """Base class for Conneqtech entities."""
+
+    # Entities showing the location set this to rate limit their writes.
+    _throttle_location = False
+    _location_throttle: LocationThrottle | None = None
+    # Minimum seconds between state writes, 0 writes every update.
+    _state_interval: float = 0
+    _state_throttle: StateThrottle | None = None
+
     @property
     def device_info(self):
         return {
@@ -14,3 +32,35 @@ class CntDevice(CoordinatorEntity):
             "model": self.coordinator.data.device_type,
             "sw_version": self.coordinator.data.firmware_version,
         }
+
+    async def async_added_to_hass(self) -> None:
+        """Set up the location throttle when it is configured."""
+        await super().async_added_to_hass()
+        options = self.coordinator.config_entry.options
+        min_interval = options.get(
+            CONF_LOCATION_INTERVAL, DEFAULT_LOCATION_INTERVAL)
+        min_distance = options.get(
+            CONF_LOCATION_DISTANCE, DEFAULT_LOCATION_DISTANCE)
+        # The state interval goes first, the distance gate would only hold
+        # back writes it lets through and is left out.
+        if self._state_interval:
+            interval = self._state_interval
+            if self._throttle_location:
+                interval = max(interval, min_interval)
+            self._state_throttle = StateThrottle(
+                self.hass, interval, self.async_write_ha_state)
+            self.async_on_remove(self._state_throttle.async_cancel)
+        elif self._throttle_location and (min_interval or min_distance):
+            self._location_throttle = LocationThrottle(
+                self.hass, min_interval, min_distance, self.async_write_ha_state)
+            self.async_on_remove(self._location_throttle.async_cancel)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._state_throttle is not None:
+            self._state_throttle.async_update()
+            return
+        if self._location_throttle is not None:
+            self._location_throttle.async_update(self.coordinator.data)
+            return
+        super()._handle_coordinator_update()
@@ -3,18 +3,59 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 
 from homeassistant import config_entries
-from homeassistant.config_entries import ConfigEntry, ConfigFlow
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
 from homeassistant.const import CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_DEVICE_ID
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.importlib import async_import_module
+from homeassistant.helpers.selector import ObjectSelector
 
 from aiohttp import ClientResponseError
 
-from .const import DOMAIN, LOGGER
-from .conneqtechapi import ConneqtechApi
+from .const import (
+    DOMAIN,
+    LOGGER,
+    CONF_COALESCE_WINDOW,
+    CONF_DEADBANDS,
+    CONF_GEOFENCES,
+    CONF_STATISTICS,
+    CONF_LOCATION_DISTANCE,
+    CONF_LOCATION_INTERVAL,
+    CONF_TRIP_IDLE_TIME,
+    CONF_TRIP_MIN_SPEED,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEADBANDS,
+    DEFAULT_LOCATION_DISTANCE,
+    DEFAULT_LOCATION_INTERVAL,
+    DEFAULT_STATISTICS,
+    DEFAULT_TRIP_IDLE_TIME,
+    DEFAULT_TRIP_MIN_SPEED,
+)
 
 import voluptuous as vol
 
+CIRCLE_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): cv.string,
+        vol.Required("latitude"): cv.latitude,
+        vol.Required("longitude"): cv.longitude,
+        vol.Required("radius"): vol.All(vol.Coerce(float), vol.Range(min=1)),
+    }
+)
+POLYGON_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): cv.string,
+        # [latitude, longitude] corners.
+        vol.Required("polygon"): vol.All(
+            [vol.ExactSequence([cv.latitude, cv.longitude])], vol.Length(min=3)),
+    }
+)
+# Validated on submit, the form shows them as a plain object.
+GEOFENCES_SCHEMA = vol.All(
+    cv.ensure_list, [vol.Any(CIRCLE_SCHEMA, POLYGON_SCHEMA)])
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_CLIENT_ID): str,
@@ -41,6 +82,12 @@ class ConneqtechConfigFlow(ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return ConneqtechOptionsFlow(config_entry)
+
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._existing_entry: config_entries.ConfigEntry | None = None
@@ -95,6 +142,10 @@ class ConneqtechConfigFlow(ConfigFlow, domain=DOMAIN):
         client_id = user_input[CONF_CLIENT_ID]
         client_secret = user_input[CONF_CLIENT_SECRET]
         try:
+            # The API stack is only loaded once credentials are submitted.
+            await async_import_module(self.hass, f"{__package__}.conneqtechapi")
+            from .conneqtechapi import ConneqtechApi
+
             LOGGER.debug("create ConneqtechApi")
             self.conneqtechApi = ConneqtechApi(
                 self.hass,
@@ -136,3 +187,72 @@ class ConneqtechConfigFlow(ConfigFlow, domain=DOMAIN):
             self.context["entry_id"])
 
         return await self.async_step_user(user_input)
+
+
+class ConneqtechOptionsFlow(OptionsFlow):
+    """Handle Conneqtech options."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                user_input[CONF_GEOFENCES] = GEOFENCES_SCHEMA(
+                    user_input.get(CONF_GEOFENCES) or [])
+            except vol.Invalid:
+                errors[CONF_GEOFENCES] = "invalid_geofences"
+            else:
+                return self.async_create_entry(
+                    title="", data={**self._entry.options, **user_input})
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_COALESCE_WINDOW,
+                        default=options.get(
+                            CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                    vol.Optional(
+                        CONF_DEADBANDS,
+                        default=options.get(CONF_DEADBANDS, DEFAULT_DEADBANDS),
+                    ): bool,
+                    vol.Optional(
+                        CONF_LOCATION_INTERVAL,
+                        default=options.get(
+                            CONF_LOCATION_INTERVAL, DEFAULT_LOCATION_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        CONF_LOCATION_DISTANCE,
+                        default=options.get(
+                            CONF_LOCATION_DISTANCE, DEFAULT_LOCATION_DISTANCE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+                    vol.Optional(
+                        CONF_TRIP_MIN_SPEED,
+                        default=options.get(
+                            CONF_TRIP_MIN_SPEED, DEFAULT_TRIP_MIN_SPEED),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=1, max=50)),
+                    vol.Optional(
+                        CONF_TRIP_IDLE_TIME,
+                        default=options.get(
+                            CONF_TRIP_IDLE_TIME, DEFAULT_TRIP_IDLE_TIME),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=30, max=7200)),
+                    vol.Optional(
+                        CONF_STATISTICS,
+                        default=options.get(
+                            CONF_STATISTICS, DEFAULT_STATISTICS),
+                    ): bool,
+                    vol.Optional(
+                        CONF_GEOFENCES,
+                        default=options.get(CONF_GEOFENCES, []),
+                    ): ObjectSelector(),
+                }
+            ),
+            errors=errors,
+        )
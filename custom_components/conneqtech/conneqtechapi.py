@@ -3,19 +3,84 @@
 from __future__ import annotations
 
 
-from typing import Any, Callable, Optional
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
 
 from aiohttp import ClientSession, BasicAuth, ClientTimeout
-from aiohttp.client_exceptions import ClientConnectionError
 from aiohttp_sse_client2 import client as sse_client
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.config_entries import ConfigEntry
-# from datetime import timedelta
+from homeassistant.util import dt as dt_util
+from .decode import ingest_event, json_loads
 from .device import ConneqtechDevice
-from .const import LOGGER, DOMAIN, set_nested_value
+from .const import (
+    LOGGER,
+    DOMAIN,
+    CONF_COALESCE_WINDOW,
+    CONF_DEADBANDS,
+    DEADBANDS,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEADBANDS,
+    API_BASE_URL,
+    KEY_STREAM_STATE,
+    KEY_UPDATE_MODE,
+    POLL_INTERVAL_MOVING,
+    POLL_INTERVAL_PARKED,
+    REST_TIMEOUT,
+    STREAM_STATE_BACKOFF,
+    STREAM_STATE_CIRCUIT_OPEN,
+    STREAM_STATE_CONNECTED,
+    STREAM_STATE_CONNECTING,
+    UPDATE_MODE_POLLING,
+    UPDATE_MODE_PUSH,
+)
+from .metrics import EventRate, Histogram, StreamMetrics
+from .paths import compile_path
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-import json
+
+if TYPE_CHECKING:
+    from .account import ConneqtechAccount
+
+
+@dataclass
+class UpdateStats:
+    """Counters of the coordinator update path."""
+
+    changes_received: int = 0
+    changes_dropped: int = 0
+    updates_published: int = 0
+    state_writes_saved: int = 0
+    rest_errors: int = 0
+    polls: int = 0
+    polls_not_modified: int = 0
+    last_event: datetime | None = None
+    events: EventRate = field(default_factory=EventRate)
+    apply_latency: Histogram = field(default_factory=Histogram)
+    notify_latency: Histogram = field(default_factory=Histogram)
+    rest_latency: Histogram = field(default_factory=Histogram)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "changes_received": self.changes_received,
+            "changes_dropped": self.changes_dropped,
+            "updates_published": self.updates_published,
+            "state_writes_saved": self.state_writes_saved,
+            "rest_errors": self.rest_errors,
+            "polls": self.polls,
+            "polls_not_modified": self.polls_not_modified,
+            "last_event": self.last_event,
+            "events_total": self.events.total,
+            "events_per_minute": self.events.per_minute,
+            "apply_latency": self.apply_latency.as_dict(),
+            "notify_latency": self.notify_latency.as_dict(),
+            "rest_latency": self.rest_latency.as_dict(),
+        }
 
 
 class Coordinator(DataUpdateCoordinator):
@@ -26,29 +91,269 @@ class Coordinator(DataUpdateCoordinator):
             hass: HomeAssistant,
             config_entry: ConfigEntry,
             api: ConneqtechApi,
+            account: ConneqtechAccount | None = None,
     ) -> None:
         """Initialize the Conneqtech API class."""
         self.api = api
+        self.account = account
+        self.stats = UpdateStats()
+        # Bumped whenever the data changes, lets entities memoize reads.
+        self.data_version = 0
+        self.stream_state = STREAM_STATE_CONNECTING
+        self.update_mode = UPDATE_MODE_PUSH
+        self._coalesce_window: float = config_entry.options.get(
+            CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)
+        self._deadbands: dict[str, float] = DEADBANDS if config_entry.options.get(
+            CONF_DEADBANDS, DEFAULT_DEADBANDS) else {}
+        self._pending_changes = 0
+        self._pending_keys: set[str] = set()
+        self._notify_keys: set[str] | None = None
+        self._last_notified = 0
+        self._key_index: tuple[list, dict, dict] | None = None
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._processors: list[Callable[[
+            ConneqtechDevice, dict[str, Any] | None], Iterable[str]]] = []
         super().__init__(
             hass,
             LOGGER,
             name=f"{DOMAIN} ({config_entry.unique_id})",
             # Set update method to get devices on first load.
-            update_method=self.api.async_update_data,
-            # Do not set a polling interval as data will be pushed.
-            # You can remove this line but left here for explanatory purposes.
-            update_interval=None,  # timedelta(seconds=15),
+            update_method=self.async_update_device,
+            # Data is pushed, polling is switched on by
+            # _async_set_update_mode while the stream is down.
+            update_interval=None,
         )
+        self.config_entry = config_entry
+
+    async def async_update_device(self) -> ConneqtechDevice:
+        """Fetch the REST snapshot, updating the device state in place."""
+        start = time.perf_counter()
+        polling = self.update_mode == UPDATE_MODE_POLLING and self.data is not None
+        try:
+            if polling:
+                self.stats.polls += 1
+                device = await self.api.async_get_device(
+                    self.api.device_id, conditional=True)
+            elif self.account is not None:
+                device = await self.account.async_get_device(self.api.device_id)
+            else:
+                device = await self.api.async_update_data()
+        except Exception:
+            self.stats.rest_errors += 1
+            raise
+        finally:
+            self.stats.rest_latency.observe_since(start)
+        if self.data is None:
+            return device
+        if device is None:
+            # Not modified, only wake the listeners of every update.
+            self.stats.polls_not_modified += 1
+            self._notify_keys = set()
+            return self.data
+        self.data.update(device.raw)
+        if polling:
+            self.update_interval = self._poll_interval()
+        for processor in self._processors:
+            processor(self.data, None)
+        return self.data
+
+    @callback
+    def async_add_processor(
+            self,
+            processor: Callable[[ConneqtechDevice, dict[str, Any] | None], Iterable[str]],
+    ) -> CALLBACK_TYPE:
+        """Run a processor whenever the device data changed.
+
+        The processor receives the device and the applied changes, or None
+        after a full refresh, and returns the derived key paths it updated.
+        Those are notified together with the changes.
+        """
+        self._processors.append(processor)
+
+        @callback
+        def remove_processor() -> None:
+            self._processors.remove(processor)
 
-    async def async_connect(self) -> None:
-        """Connect to the Conneqtech API."""
-        await self.api.async_connect(self.update_data)
+        return remove_processor
 
-    def update_data(self, key: str, val: Any) -> None:
-        """Update the data."""
+    @callback
+    def update_data(self, changes: dict[str, Any]) -> None:
+        """Apply the changes of one stream event and notify listeners once."""
+        start = time.perf_counter()
+        stats = self.stats
+        stats.events.hit()
+        stats.last_event = dt_util.utcnow()
+        stats.changes_received += len(changes)
+        changes = self._filter_changes(changes)
+        if not changes:
+            return
+        self.data.apply_changes(changes)
+        self.data_version += 1
+        self._pending_changes += len(changes)
+        self._pending_keys.update(changes)
+        for processor in self._processors:
+            self._pending_keys.update(processor(self.data, changes))
+        stats.apply_latency.observe_since(start)
 
-        self.data.raw = set_nested_value(self.data.raw, key, val)
+        if self._coalesce_window <= 0:
+            self._async_flush()
+        elif self._cancel_flush is None:
+            self._cancel_flush = async_call_later(
+                self.hass, self._coalesce_window, self._async_flush)
+
+    def _filter_changes(self, changes: dict[str, Any]) -> dict[str, Any]:
+        """Drop changes that resend the current value or stay in a deadband."""
+        raw = self.data.raw
+        kept = {}
+        for key, val in changes.items():
+            current = compile_path(key).get(raw)
+            if val == current:
+                continue
+            deadband = self._deadbands.get(key)
+            if (
+                deadband is not None
+                and type(val) in (int, float) and type(current) in (int, float)
+                and abs(val - current) < deadband
+            ):
+                continue
+            kept[key] = val
+        self.stats.changes_dropped += len(changes) - len(kept)
+        return kept
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """Notify listeners of all changes applied since the last flush."""
+        self._cancel_flush = None
+        if not self._pending_changes:
+            return
+        # Without batching every change would have written every entity.
+        naive_writes = self._pending_changes * len(self._listeners)
+        self._notify_keys = self._pending_keys
+        self._pending_keys = set()
+        self._pending_changes = 0
+        self.stats.updates_published += 1
+        start = time.perf_counter()
         self.async_set_updated_data(self.data)
+        self.stats.notify_latency.observe_since(start)
+        self.stats.state_writes_saved += naive_writes - self._last_notified
+
+    @callback
+    def async_set_stream_state(self, state: str) -> None:
+        """Record the state of the event stream carrying this device."""
+        if state == self.stream_state:
+            return
+        self.stream_state = state
+        keys = [KEY_STREAM_STATE]
+        if state == STREAM_STATE_CONNECTED:
+            mode = UPDATE_MODE_PUSH
+        elif state in (STREAM_STATE_BACKOFF, STREAM_STATE_CIRCUIT_OPEN):
+            mode = UPDATE_MODE_POLLING
+        else:
+            # Reconnecting, keep polling until the stream is back.
+            mode = self.update_mode
+        if mode != self.update_mode:
+            self._async_set_update_mode(mode)
+            keys.append(KEY_UPDATE_MODE)
+        self.async_publish(keys)
+
+    @callback
+    def _async_set_update_mode(self, mode: str) -> None:
+        """Switch between push updates and polling."""
+        LOGGER.info(f"Switching {self.name} to {mode} updates")
+        self.update_mode = mode
+        if mode == UPDATE_MODE_POLLING:
+            # A stream that recovers within the first interval is not polled.
+            self.update_interval = self._poll_interval()
+            self._schedule_refresh()
+        else:
+            self.update_interval = None
+            self._async_unsub_refresh()
+
+    def _poll_interval(self) -> timedelta:
+        """Poll fast while the device moves and slow while parked."""
+        moving = self.data is not None and self.data.speed
+        return timedelta(
+            seconds=POLL_INTERVAL_MOVING if moving else POLL_INTERVAL_PARKED)
+
+    @callback
+    def async_publish(self, keys: Iterable[str]) -> None:
+        """Notify the listeners of key paths that changed outside an update."""
+        if self.data is not None:
+            self._notify_keys = set(keys)
+            self.async_update_listeners()
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> Callable[[], None]:
+        """Listen for data updates.
+
+        The context is an iterable of the key paths the listener reads, a
+        listener without context is notified of every update.
+        """
+        remove = super().async_add_listener(update_callback, context)
+        self._key_index = None
+
+        @callback
+        def remove_listener() -> None:
+            remove()
+            self._key_index = None
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners that read one of the changed keys."""
+        keys, self._notify_keys = self._notify_keys, None
+        self.data_version += 1
+        if keys is None:
+            # Full refresh, everything may have changed.
+            self._last_notified = len(self._listeners)
+            super().async_update_listeners()
+            return
+
+        always, by_path, by_prefix = self._get_key_index()
+        selected = dict.fromkeys(always)
+        for key in keys:
+            # Listeners reading the changed key or anything below it.
+            selected.update(dict.fromkeys(by_prefix.get(key, ())))
+            # Listeners reading a parent of the changed key.
+            for prefix in compile_path(key).prefixes:
+                selected.update(dict.fromkeys(by_path.get(prefix, ())))
+
+        self._last_notified = len(selected)
+        for update_callback in selected:
+            update_callback()
+
+    def _get_key_index(self) -> tuple[list, dict, dict]:
+        """Index the listeners by the key paths they read and their prefixes."""
+        if self._key_index is not None:
+            return self._key_index
+
+        always: list[CALLBACK_TYPE] = []
+        by_path: dict[str, list[CALLBACK_TYPE]] = defaultdict(list)
+        by_prefix: dict[str, list[CALLBACK_TYPE]] = defaultdict(list)
+        for update_callback, context in self._listeners.values():
+            if context is None:
+                always.append(update_callback)
+                continue
+            for path in context:
+                by_path[path].append(update_callback)
+                by_prefix[path].append(update_callback)
+                for prefix in compile_path(path).prefixes:
+                    by_prefix[prefix].append(update_callback)
+
+        self._key_index = (always, dict(by_path), dict(by_prefix))
+        return self._key_index
+
+    async def async_shutdown(self) -> None:
+        """Cancel a pending flush."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        await super().async_shutdown()
+
+
+class StreamEnded(Exception):
+    """The server ended an event stream."""
 
 
 class ConneqtechApi:
@@ -60,60 +365,122 @@ class ConneqtechApi:
             client_id: str,
             client_secret: str,
             device_id: Optional[str],
+            session: Optional[ClientSession] = None,
     ) -> None:
         """Initialize the Conneqtech API class."""
         LOGGER.debug(f"Initializing Conneqtech API for {device_id}")
 
         self.hass: HomeAssistant = hass
-        self.session: ClientSession = async_get_clientsession(hass)
+        self.session: ClientSession = session or async_get_clientsession(hass)
+        self._rest_timeout = ClientTimeout(total=REST_TIMEOUT)
+        # ETag and Last-Modified of the last response per device.
+        self._validators: dict[str, tuple[str | None, str | None]] = {}
+        self.base_url = API_BASE_URL
+        self.client_id = client_id
         self.auth = BasicAuth(
             client_id,
             client_secret,
         )
         self.device_id = device_id
 
-    async def async_connect(self, callback: Callable[[str, Any], None]) -> None:
-        """Connect to the Conneqtech API."""
-        imei = self.device_id
-
-        while True:
-            LOGGER.debug(f"Connecting to Conneqtech API for {imei}")
-            async with sse_client.EventSource(
-                f"https://api.iot.conneq.tech/v2/es/device?imeis={imei}",
-                session=ClientSession(timeout=ClientTimeout(total=None)),
-                auth=self.auth,
-            ) as event_source:
+    async def async_connect(
+            self,
+            imeis: list[str],
+            callback: Callable[[str, dict[str, Any]], None],
+            on_open: Callable[[], None] | None = None,
+            idle_timeout: float | None = None,
+            last_event_id: str | None = None,
+            on_event: Callable[[str | None], None] | None = None,
+            metrics: StreamMetrics | None = None,
+            on_raw_event: Callable[[str, str | None, str], None] | None = None,
+    ) -> None:
+        """Stream the events of a group of devices until the connection ends.
+
+        Connection errors are raised to the caller, which decides when to
+        reconnect. A stream that stays silent for idle_timeout seconds
+        raises TimeoutError. Passing the id of the last received event asks
+        the server to resume after it. on_event is called for every event
+        with its id, or None when the server sends none. on_raw_event receives the id, default IMEI and raw data
+        of every event, for recording.
+        """
+        imei_list = ",".join(imeis)
+        # Only a stream of one device can credit events without an IMEI.
+        default_imei = imeis[0] if len(imeis) == 1 else None
+        headers = {}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+
+        def on_error() -> None:
+            # Once the server ends the stream the library waits and
+            # reconnects by itself. Stop it there, every reconnect is paced
+            # by the caller.
+            if event_source.ready_state == sse_client.READY_STATE_CONNECTING:
+                raise StreamEnded
+
+        LOGGER.debug(f"Connecting to Conneqtech API for {imei_list}")
+        event_source = sse_client.EventSource(
+            f"{self.base_url}/v2/es/device?imeis={imei_list}",
+            session=self.session,
+            auth=self.auth,
+            reconnection_time=timedelta(0),
+            max_connect_retry=0,
+            on_error=on_error,
+            timeout=ClientTimeout(total=None, sock_connect=REST_TIMEOUT),
+            headers=headers,
+        )
+        async with event_source:
+            if on_open is not None:
+                on_open()
+            events = aiter(event_source)
+            while True:
                 try:
-                    async for event in event_source:
-                        data = json.loads(event.data)
-                        if data.get("type") == "updated":
-                            for key, val in data.get("changes").items():
-                                LOGGER.debug(f"Received event {
-                                    imei} change: {key} - {val}")
-                                if callback is not None:
-                                    callback(key, val)
-                except ClientConnectionError as e:
-                    LOGGER.error(f"Connection error {imei}: {e}")
-                except Exception as e:
-                    LOGGER.error(f"Error {imei}: {e}")
-                LOGGER.debug(f"Connection closed for {imei}")
+                    async with asyncio.timeout(idle_timeout):
+                        event = await anext(events)
+                except (StopAsyncIteration, StreamEnded):
+                    break
+                if on_event is not None:
+                    on_event(event.last_event_id or None)
+                if on_raw_event is not None:
+                    on_raw_event(event.last_event_id, default_imei, event.data)
+                ingest_event(event.data, default_imei, callback, metrics)
+        LOGGER.debug(f"Connection closed for {imei_list}")
 
     async def async_update_data(self) -> Any:
         return await self.async_get_device(self.device_id)
 
     async def async_init(self) -> None:
         """Initialize the Conneqtech API class."""
-        resp = await self.session.get(
-            "https://api.iot.conneq.tech/v2/device?query=imei:0&limit=0",
+        async with self.session.get(
+            f"{self.base_url}/v2/device?query=imei:0&limit=0",
             auth=self.auth,
-        )
-        resp.raise_for_status()
+            timeout=self._rest_timeout,
+        ) as resp:
+            resp.raise_for_status()
 
-    async def async_get_device(self, device_id: str) -> ConneqtechDevice:
-        """Get device data."""
-        resp = await self.session.get(
-            f"https://api.iot.conneq.tech/v2/device/{device_id}",
+    async def async_get_device(self, device_id: str, conditional: bool = False) -> ConneqtechDevice | None:
+        """Get device data.
+
+        A conditional request returns None when the device did not change
+        since the last response, as validated by its ETag or Last-Modified.
+        """
+        headers = {}
+        if conditional and (validators := self._validators.get(device_id)):
+            etag, last_modified = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        async with self.session.get(
+            f"{self.base_url}/v2/device/{device_id}",
             auth=self.auth,
-        )
-        resp.raise_for_status()
-        return ConneqtechDevice(await resp.json())
+            timeout=self._rest_timeout,
+            headers=headers,
+        ) as resp:
+            if resp.status == 304:
+                return None
+            resp.raise_for_status()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._validators[device_id] = (etag, last_modified)
+            return ConneqtechDevice(await resp.json(loads=json_loads))
@@ -4,11 +4,15 @@ import logging
 from homeassistant.const import Platform
 from datetime import datetime
 
+from .paths import compile_path
+
 DOMAIN = "conneqtech"
 TOPIC_UPDATE: str = f"{DOMAIN}_update_{0}"
 
 LOGGER = logging.getLogger(__name__)
 
+API_BASE_URL = "https://api.iot.conneq.tech"
+
 PLATFORMS: list[Platform] = [
     Platform.DEVICE_TRACKER,
     Platform.SENSOR,
@@ -17,6 +21,159 @@ PLATFORMS: list[Platform] = [
 CONF_CLIENT_ID = "client_id"
 CONF_CLIENT_SECRET = "client_secret"
 CONF_DEVICE_ID = "device_id"
+CONF_PATH = "path"
+CONF_SPEED = "speed"
+CONF_IMEI = "imei"
+CONF_TOLERANCE = "tolerance"
+CONF_SINCE = "since"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_DEADBANDS = "deadbands"
+CONF_LOCATION_INTERVAL = "location_interval"
+CONF_LOCATION_DISTANCE = "location_distance"
+CONF_TRIP_MIN_SPEED = "trip_min_speed"
+CONF_TRIP_IDLE_TIME = "trip_idle_time"
+CONF_GEOFENCES = "geofences"
+CONF_STATISTICS = "statistics"
+
+# Seconds to collect stream changes before notifying entities, 0 notifies
+# once per received event.
+DEFAULT_COALESCE_WINDOW = 0.0
+DEFAULT_DEADBANDS = False
+# Minimum seconds and meters between location writes while moving, 0 writes
+# every update.
+DEFAULT_LOCATION_INTERVAL = 0
+DEFAULT_LOCATION_DISTANCE = 0
+# Seconds without updates after which a skipped location is written, when
+# only a distance is set.
+LOCATION_FLUSH_DELAY = 30
+# A trip starts at this speed in km/h and ends after standing still for this
+# many seconds.
+DEFAULT_TRIP_MIN_SPEED = 5
+DEFAULT_TRIP_IDLE_TIME = 300
+# Import speed, signal strength and battery voltage as long-term statistics
+# instead of recording every state.
+DEFAULT_STATISTICS = False
+
+# Numeric changes smaller than these are dropped when deadbands are enabled.
+DEADBANDS: dict[str, float] = {
+    "payload_state.tracker.metric.rssi": 2,
+    "payload_state.tracker.metric.bbatv": 0.01,
+    "payload_state.device.metric.bmv": 0.01,
+}
+
+# Key paths read by entities that are not plain sensors.
+KEY_COORDINATES = "payload_state.tracker.loc.geo.coordinates"
+KEY_BATTERY_LEVEL = "payload_state.tracker.metric.bbatp"
+KEY_BATTERY_VOLTAGE = "payload_state.tracker.metric.bbatv"
+KEY_LOCATION = "payload_state.tracker.loc"
+# Pseudo key path notified when the running or last trip changes.
+KEY_TRIP = "_trip"
+
+EVENT_TRIP_ENDED = f"{DOMAIN}_trip_ended"
+# Altitude rises smaller than this many meters are GPS noise, not climbs.
+TRIP_ELEVATION_THRESHOLD = 3
+# Pseudo key paths notified when the odometer or battery drain changes.
+KEY_ODOMETER = "_odometer"
+KEY_BATTERY_DRAIN = "_battery_drain"
+# Meters a standing device must move before the odometer counts it.
+ODOMETER_MIN_STEP = 25
+# Seconds of battery samples the drain rate is fitted over, and the span
+# needed before a rate is reported.
+BATTERY_DRAIN_WINDOW = 6 * 3600
+BATTERY_DRAIN_MIN_SPAN = 900
+# Location fixes kept per device for the track, a fix is skipped when it is
+# closer than this many meters to the previous one, unless this many
+# seconds passed.
+TRACK_CAPACITY = 2000
+TRACK_MIN_DISTANCE = 5
+TRACK_MAX_GAP = 300
+# Default Douglas-Peucker tolerance of a requested track in meters.
+DEFAULT_TRACK_TOLERANCE = 10
+# Seconds of the statistics buckets and the minimum seconds between state
+# writes of the aggregated sensors.
+STATISTICS_BUCKET = 300
+STATISTICS_STATE_INTERVAL = 300
+# Part of the device data that is searched for sensors.
+DISCOVERY_ROOT = "payload_state"
+# Pseudo key path notified when a device enters or leaves a geofence.
+KEY_GEOFENCE = "_geofence"
+EVENT_GEOFENCE_ENTER = f"{DOMAIN}_geofence_enter"
+EVENT_GEOFENCE_EXIT = f"{DOMAIN}_geofence_exit"
+# Grid cells of the geofence index in degrees, about 1 km, and the cells a
+# single geofence may cover before it is tested on every lookup.
+GEOFENCE_CELL_SIZE = 0.01
+GEOFENCE_MAX_CELLS = 2500
+
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+SERVICE_REPLAY_RECORDING = "replay_recording"
+SERVICE_GET_TRACK = "get_track"
+
+DATA_STREAMS = f"{DOMAIN}_streams"
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_ACCOUNTS = f"{DOMAIN}_accounts"
+
+# Device snapshots fetched at the same time while bootstrapping an account,
+# and seconds a prefetched snapshot waits for its entry.
+BOOTSTRAP_CONCURRENCY = 4
+BOOTSTRAP_RESULT_TTL = 60
+
+STORAGE_VERSION = 1
+# Seconds to collect changes before the device snapshot is written to disk.
+STORAGE_SAVE_DELAY = 60
+
+# Connection pool of the shared HTTP session.
+SESSION_DNS_CACHE_TTL = 300
+SESSION_KEEPALIVE_TIMEOUT = 60
+SESSION_CONNECTION_LIMIT = 100
+# Seconds a REST call may take.
+REST_TIMEOUT = 30
+
+# Maximum number of IMEIs carried by a single event stream connection.
+STREAM_MAX_IMEIS = 50
+# Seconds to wait for more devices to be added before (re)connecting a stream.
+STREAM_RESTART_DELAY = 1.0
+# Reconnect a stream that did not deliver an event for this many seconds.
+STREAM_IDLE_TIMEOUT = 600
+# Exponential reconnect backoff in seconds, jitter is added on top.
+STREAM_BACKOFF_MIN = 1.0
+STREAM_BACKOFF_MAX = 300.0
+# Changes that may wait for the coordinators before the oldest are dropped.
+INGEST_QUEUE_MAX_KEYS = 10000
+# Recorded stream events are written every this many events or seconds.
+RECORD_FLUSH_EVENTS = 500
+RECORD_FLUSH_INTERVAL = 10
+# Outages up to this many seconds are resumed from the last event id, longer
+# ones are backfilled with a REST refresh.
+STREAM_RESUME_WINDOW = 300
+# A connection that stayed up this long resets the failure count.
+STREAM_STABLE_TIME = 60
+# Consecutive failures that open the circuit, and how long it stays open.
+STREAM_CIRCUIT_THRESHOLD = 5
+STREAM_CIRCUIT_COOLDOWN = 900
+
+STREAM_STATE_CONNECTING = "connecting"
+STREAM_STATE_CONNECTED = "connected"
+STREAM_STATE_BACKOFF = "backoff"
+STREAM_STATE_CIRCUIT_OPEN = "circuit_open"
+STREAM_STATES = [
+    STREAM_STATE_CONNECTING,
+    STREAM_STATE_CONNECTED,
+    STREAM_STATE_BACKOFF,
+    STREAM_STATE_CIRCUIT_OPEN,
+]
+# Pseudo key path notified when the stream state of a device changes.
+KEY_STREAM_STATE = "_stream.state"
+
+# Devices are polled over REST while their stream is down.
+UPDATE_MODE_PUSH = "push"
+UPDATE_MODE_POLLING = "polling"
+UPDATE_MODES = [UPDATE_MODE_PUSH, UPDATE_MODE_POLLING]
+# Pseudo key path notified when the update mode of a device changes.
+KEY_UPDATE_MODE = "_update.mode"
+# Seconds between polls while the device moves and while it is parked.
+POLL_INTERVAL_MOVING = 30
+POLL_INTERVAL_PARKED = 300
 
 
 def parse_datetime(dt: str | None) -> datetime:
@@ -32,46 +189,9 @@ def parse_datetime(dt: str | None) -> datetime:
 
 def get_nested_value(obj, key):
     """Retrieve the value of a dot-separated key from a nested object."""
-    keys = key.split('.')
-    for k in keys:
-        if isinstance(obj, dict):
-            obj = obj.get(k)
-        elif isinstance(obj, list):
-            try:
-                k = int(k)
-                obj = obj[k]
-            except (ValueError, IndexError):
-                return None
-        else:
-            return None
-    return obj
+    return compile_path(key).get(obj)
 
 
 def set_nested_value(obj, key, value) -> dict:
     """Set the value of a dot-separated key in a nested object."""
-    keys = key.split('.')
-    d = obj
-    for k in keys[:-1]:
-        if isinstance(d, dict):
-            d = d.setdefault(k, {})
-        elif isinstance(d, list):
-            try:
-                k = int(k)
-                while len(d) <= k:
-                    d.append({})
-                d = d[k]
-            except (ValueError, IndexError):
-                return obj
-        else:
-            return obj
-    if isinstance(d, dict):
-        d[keys[-1]] = value
-    elif isinstance(d, list):
-        try:
-            k = int(keys[-1])
-            while len(d) <= k:
-                d.append(None)
-            d[k] = value
-        except (ValueError, IndexError):
-            return obj
-    return obj
+    return compile_path(key).set(obj, value)
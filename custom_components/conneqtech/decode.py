@@ -0,0 +1,71 @@
+"""Decoding of Conneqtech stream events."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .metrics import StreamMetrics
+
+# Cheap check done before parsing, only updated events carry changes.
+_UPDATED_MARKER = '"updated"'
+
+
+def decode_event(data: str) -> tuple[str | None, dict[str, Any]] | None:
+    """Return the IMEI and changes of an updated event, None otherwise."""
+    if _UPDATED_MARKER not in data:
+        return None
+    try:
+        payload = json_loads(data)
+    except ValueError:
+        LOGGER.debug("Ignoring undecodable event: %s", data)
+        return None
+    if type(payload) is not dict or payload.get("type") != "updated":
+        return None
+    changes = payload.get("changes")
+    if not changes or type(changes) is not dict:
+        return None
+    return payload.get("imei"), changes
+
+
+def ingest_event(
+        data: str,
+        default_imei: str | None,
+        callback: Callable[[str, dict[str, Any]], None] | None,
+        metrics: StreamMetrics | None = None,
+) -> None:
+    """Decode a raw stream event and hand its changes to the callback.
+
+    default_imei is the device of a stream carrying a single IMEI, events
+    without an IMEI are dropped on other streams.
+    """
+    if metrics is not None:
+        start = time.perf_counter()
+        decoded = decode_event(data)
+        metrics.events.hit()
+        metrics.decode_latency.observe_since(start)
+    else:
+        decoded = decode_event(data)
+    if decoded is None:
+        return
+    imei, changes = decoded
+    # A stream for a single device may omit the IMEI.
+    if not (imei := imei or default_imei):
+        LOGGER.debug("Ignoring event without IMEI: %s", data)
+        if metrics is not None:
+            metrics.decode_errors += 1
+        return
+    imei = str(imei)
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug("Received event %s changes: %s", imei, changes)
+    if callback is not None:
+        callback(imei, changes)
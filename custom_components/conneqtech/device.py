@@ -1,74 +1,123 @@
 """Conneqtech device"""
 
 from __future__ import annotations
-from attr import dataclass
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Callable, Optional
 from datetime import datetime
 
-from .const import parse_datetime
+from .const import (
+    KEY_BATTERY_LEVEL,
+    KEY_BATTERY_VOLTAGE,
+    KEY_COORDINATES,
+    parse_datetime,
+)
+from .paths import KeyPath, compile_path
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _coordinate(index: int) -> Callable[[Any], Optional[float]]:
+    def convert(value: Any) -> Optional[float]:
+        if isinstance(value, list) and len(value) > index:
+            return value[index]
+        return None
+    return convert
+
+
+# (key path, slot, converter) of the typed fields, converters run on ingest.
+_FIELDS: tuple[tuple[KeyPath, str, Callable[[Any], Any]], ...] = tuple(
+    (compile_path(key), slot, convert)
+    for key, slot, convert in (
+        ("imei", "imei", _identity),
+        ("params", "params", _identity),
+        ("device_type", "device_type", _identity),
+        (KEY_COORDINATES, "longitude", _coordinate(0)),
+        (KEY_COORDINATES, "latitude", _coordinate(1)),
+        ("payload_state.dts", "last_connection_date", parse_datetime),
+        ("payload_state.tracker.loc.dtg", "last_location_date", parse_datetime),
+        ("payload_state.tracker.loc.sp", "speed", _identity),
+        ("payload_state.tracker.loc.alt", "altitude", _identity),
+        ("payload_state.tracker.loc.ang", "course", _identity),
+        ("payload_state.tracker.config.fwver", "firmware_version", _identity),
+        (KEY_BATTERY_LEVEL, "battery_level", _identity),
+        (KEY_BATTERY_VOLTAGE, "battery_voltage", _identity),
+        ("payload_state.tracker.metric.rssi", "rssi", _identity),
+        ("payload_state.device.metric.bmv", "external_battery_voltage", _identity),
+    )
+)
+
+# Typed fields holding the (converted) value of exactly one key path.
+_FIELD_BY_KEY: dict[str, str] = {
+    path.key: slot for path, slot, _ in _FIELDS if path.key != KEY_COORDINATES
+}
+
+
+@lru_cache(maxsize=512)
+def _fields_for(key: str) -> tuple[tuple[KeyPath, str, Callable[[Any], Any]], ...]:
+    """Return the typed fields affected by a change of a key path."""
+    path = compile_path(key)
+    return tuple(
+        field for field in _FIELDS
+        # The field itself, a parent of it or one of its children changed.
+        if field[0].key == key or key in field[0].prefixes
+        or field[0].key in path.prefixes
+    )
 
 
-@dataclass
 class ConneqtechDevice:
-    """Device class for Conneqtech integration."""
+    """Device class for Conneqtech integration.
+
+    Known values are kept in typed slots that are converted once when the
+    REST snapshot or a stream change comes in. The raw payload is kept as a
+    passthrough for every other key.
+    """
+
+    __slots__ = ("raw",) + tuple(dict.fromkeys(slot for _, slot, _ in _FIELDS))
+
+    imei: str
+    params: dict[str, Any]
+    device_type: str
+    longitude: Optional[float]
+    latitude: Optional[float]
+    last_connection_date: Optional[datetime]
+    last_location_date: Optional[datetime]
+    speed: Optional[float]
+    altitude: Optional[float]
+    course: Optional[float]
+    firmware_version: Optional[str]
+    battery_level: Optional[int]
+    battery_voltage: Optional[float]
+    rssi: Optional[int]
+    external_battery_voltage: Optional[float]
 
     def __init__(self, raw: dict[str, Any]) -> None:
-        self.raw = raw
+        self.update(raw)
+
+    def __repr__(self) -> str:
+        return f"ConneqtechDevice(imei={self.imei!r})"
 
-    @property
-    def imei(self) -> str:
-        return self.raw.get("imei")
-
-    @property
-    def params(self) -> dict[str, Any]:
-        return self.raw.get("params")
-
-    @property
-    def device_type(self) -> str:
-        return self.raw.get("device_type")
-
-    @property
-    def longitude(self) -> Optional[float]:
-        return self.raw.get("payload_state", {}).get("tracker", {}).get(
-            "loc", {}).get("geo", {}).get("coordinates", [None, None])[0]
-
-    @property
-    def latitude(self) -> Optional[float]:
-        return self.raw.get("payload_state", {}).get("tracker", {}).get(
-            "loc", {}).get("geo", {}).get("coordinates", [None, None])[1]
-
-    @property
-    def last_connection_date(self) -> Optional[datetime]:
-        return parse_datetime(self.raw.get("payload_state", {}).get("dts"))
-
-    @property
-    def last_location_date(self) -> Optional[datetime]:
-        return parse_datetime(self.raw.get("payload_state", {}).get(
-            "tracker", {}).get("loc", {}).get("dtg"))
-
-    @property
-    def firmware_version(self) -> Optional[str]:
-        return self.raw.get("payload_state", {}).get(
-            "tracker", {}).get("config", {}).get("fwver")
-
-    @property
-    def battery_level(self) -> Optional[int]:
-        return self.raw.get("payload_state", {}).get(
-            "tracker", {}).get("metric", {}).get("bbatp")
-
-    @property
-    def speed(self) -> Optional[float]:
-        return self.raw.get("payload_state", {}).get(
-            "tracker", {}).get("loc", {}).get("sp")
-
-    @property
-    def altitude(self) -> Optional[float]:
-        return self.raw.get("payload_state", {}).get("tracker", {}).get(
-            "loc", {}).get("alt")
-
-    @property
-    def course(self) -> Optional[float]:
-        return self.raw.get("payload_state", {}).get("tracker", {}).get(
-            "loc", {}).get("ang")
-
-    raw: Optional[dict[str, Any]] = None
+    def update(self, raw: dict[str, Any]) -> None:
+        """Replace the state with a full REST snapshot."""
+        self.raw = raw
+        self._refresh(_FIELDS)
+
+    def apply_changes(self, changes: dict[str, Any]) -> None:
+        """Apply the changes of a stream event in place."""
+        raw = self.raw
+        for key, val in changes.items():
+            compile_path(key).set(raw, val)
+            if fields := _fields_for(key):
+                self._refresh(fields)
+
+    def _refresh(self, fields) -> None:
+        raw = self.raw
+        for path, slot, convert in fields:
+            setattr(self, slot, convert(path.get(raw)))
+
+    def get(self, path: KeyPath) -> Any:
+        """Return the value of a key path, typed when it is a known field."""
+        if (slot := _FIELD_BY_KEY.get(path.key)) is not None:
+            return getattr(self, slot)
+        return path.get(self.raw)
@@ -6,7 +6,7 @@ from homeassistant.components.device_tracker import SourceType
 from homeassistant.components.device_tracker.config_entry import TrackerEntity, ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, LOGGER
+from .const import DOMAIN, LOGGER, KEY_BATTERY_LEVEL, KEY_COORDINATES
 from .conneqtechapi import Coordinator
 from .cnt_device import CntDevice
 
@@ -27,6 +27,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
 class ConneqtechDeviceTracker(CntDevice, TrackerEntity):
     """Conneqtech device tracker entity."""
 
+    _throttle_location = True
+
+    def __init__(self, coordinator: Coordinator) -> None:
+        super().__init__(
+            coordinator, context=(KEY_COORDINATES, KEY_BATTERY_LEVEL))
+
     @property
     def unique_id(self) -> str:
         """Return a unique ID."""
@@ -0,0 +1,68 @@
+"""Diagnostics support for Conneqtech."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_CLIENT_SECRET,
+    CONF_DEVICE_ID,
+    CONF_GEOFENCES,
+    CONF_IMEI,
+    DATA_STREAMS,
+    DOMAIN,
+)
+
+# Credentials, device identifiers and anything that tells where the bike is
+# or has been, wherever they appear in the dump.
+TO_REDACT = {
+    CONF_CLIENT_ID,
+    CONF_CLIENT_SECRET,
+    CONF_DEVICE_ID,
+    CONF_GEOFENCES,
+    CONF_IMEI,
+    "latitude",
+    "longitude",
+    "lat",
+    "lon",
+    "start_latitude",
+    "start_longitude",
+    "end_latitude",
+    "end_longitude",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = runtime_data.coordinator
+    trip = runtime_data.trips.trip
+    manager = hass.data.get(DATA_STREAMS, {}).get(coordinator.api.client_id)
+
+    return async_redact_data({
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "device": {
+            "imei": coordinator.data.imei,
+            "device_type": coordinator.data.device_type,
+            "firmware_version": coordinator.data.firmware_version,
+            "stream_state": coordinator.stream_state,
+            "update_mode": coordinator.update_mode,
+            "update_interval": coordinator.update_interval,
+            "metrics": coordinator.stats.as_dict(),
+            "trip": trip.as_dict() if trip is not None else None,
+            "track_fixes": len(runtime_data.track),
+            "geofences": sorted(runtime_data.geofences.inside or ())
+            if runtime_data.geofences is not None else None,
+            "statistics": runtime_data.statistics.as_dict()
+            if runtime_data.statistics is not None else None,
+        },
+        "stream": manager.async_diagnostics() if manager is not None else None,
+    }, TO_REDACT)
@@ -0,0 +1,132 @@
+"""Discovery of sensors from the device payload."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    UnitOfElectricPotential,
+    UnitOfLength,
+    UnitOfSpeed,
+    UnitOfTemperature,
+)
+from homeassistant.core import callback
+
+from .const import DISCOVERY_ROOT, LOGGER
+from .device import ConneqtechDevice
+
+# Units and device classes of known leaf keys, by the last part of the path.
+DESCRIPTORS: dict[str, dict[str, Any]] = {
+    "bbatp": {
+        "native_unit_of_measurement": PERCENTAGE,
+        "device_class": SensorDeviceClass.BATTERY,
+    },
+    "bbatv": {
+        "native_unit_of_measurement": UnitOfElectricPotential.VOLT,
+        "device_class": SensorDeviceClass.VOLTAGE,
+    },
+    "bmv": {
+        "native_unit_of_measurement": UnitOfElectricPotential.VOLT,
+        "device_class": SensorDeviceClass.VOLTAGE,
+    },
+    "rssi": {
+        "native_unit_of_measurement": SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+    },
+    "temp": {
+        "native_unit_of_measurement": UnitOfTemperature.CELSIUS,
+        "device_class": SensorDeviceClass.TEMPERATURE,
+    },
+    "sp": {
+        "native_unit_of_measurement": UnitOfSpeed.KILOMETERS_PER_HOUR,
+        "device_class": SensorDeviceClass.SPEED,
+    },
+    "alt": {
+        "native_unit_of_measurement": UnitOfLength.METERS,
+        "device_class": SensorDeviceClass.DISTANCE,
+    },
+}
+
+
+def describe(key: str, value: Any) -> SensorEntityDescription | None:
+    """Return the description of a discovered leaf, None if it is no sensor."""
+    parts = key.split(".")
+    if any(part.isdigit() for part in parts):
+        # Items of lists, like the coordinates.
+        return None
+    if type(value) in (int, float):
+        extra = {"state_class": SensorStateClass.MEASUREMENT}
+    elif isinstance(value, str) and _is_timestamp(value):
+        extra = {"device_class": SensorDeviceClass.TIMESTAMP}
+    else:
+        return None
+    return SensorEntityDescription(
+        key=key,
+        # payload_state.device.metric.temp becomes Device Metric Temp.
+        name=" ".join(part.title() for part in parts[1:]),
+        entity_registry_enabled_default=False,
+        **{**extra, **DESCRIPTORS.get(parts[-1], {})},
+    )
+
+
+def _is_timestamp(value: str) -> bool:
+    if len(value) < 19 or value[10] != "T":
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+class SensorDiscovery:
+    """Create disabled sensors for payload leaves the first time they show up.
+
+    The snapshot of the device is walked on setup and on every full refresh
+    or poll. Stream changes only look at their own keys. Either way a leaf
+    that was seen before costs a set lookup.
+    """
+
+    def __init__(self, known: Iterable[str], create: Callable[[list[SensorEntityDescription]], None]) -> None:
+        self._seen: set[str] = set(known)
+        self._create = create
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, discovered sensors are created right away."""
+        if changes is None:
+            found = self._walk(DISCOVERY_ROOT, device.raw.get(DISCOVERY_ROOT))
+        else:
+            found = []
+            for key, value in changes.items():
+                if key not in self._seen and key.startswith(DISCOVERY_ROOT):
+                    found.extend(self._walk(key, value))
+        if found:
+            LOGGER.debug(
+                f"Discovered {len(found)} sensors of {device.imei}: "
+                f"{', '.join(description.key for description in found)}")
+            self._create(found)
+        return ()
+
+    def _walk(self, key: str, value: Any) -> list[SensorEntityDescription]:
+        """Describe the unseen leaves at or below a key path."""
+        if type(value) is dict:
+            found = []
+            for child, child_value in value.items():
+                found.extend(self._walk(f"{key}.{child}", child_value))
+            return found
+        if value is None or key in self._seen:
+            # A leaf without value yet is looked at again when it gets one.
+            return []
+        self._seen.add(key)
+        description = describe(key, value)
+        return [description] if description is not None else []
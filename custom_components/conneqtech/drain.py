@@ -0,0 +1,149 @@
+"""Battery drain rate of Conneqtech devices."""
+
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BATTERY_DRAIN_MIN_SPAN,
+    BATTERY_DRAIN_WINDOW,
+    KEY_BATTERY_DRAIN,
+    KEY_BATTERY_LEVEL,
+    KEY_BATTERY_VOLTAGE,
+)
+from .device import ConneqtechDevice
+from .paths import compile_path
+
+
+@lru_cache(maxsize=512)
+def _touches_battery(key: str) -> bool:
+    """Return whether a change of a key path may change the battery."""
+    path = compile_path(key)
+    return any(
+        key == battery_key
+        or battery_key in path.prefixes
+        or key in compile_path(battery_key).prefixes
+        for battery_key in (KEY_BATTERY_LEVEL, KEY_BATTERY_VOLTAGE)
+    )
+
+
+class _Trend:
+    """Least squares slope over a sliding time window.
+
+    The sums of the regression are updated when a sample enters or leaves
+    the window, so each sample costs constant time. Times are summed
+    relative to the first sample to keep the sums well conditioned.
+    """
+
+    __slots__ = ("samples", "_origin", "_n", "_t", "_y", "_tt", "_ty")
+
+    def __init__(self) -> None:
+        self.samples: deque[tuple[float, float]] = deque()
+        self.clear()
+
+    def add(self, t: float, y: float) -> bool:
+        """Add a sample, return False for a sample older than the last."""
+        if self.samples and t <= self.samples[-1][0]:
+            return False
+        if not self.samples:
+            self._origin = t
+        self.samples.append((t, y))
+        self._sum(t, y, 1)
+        while t - self.samples[0][0] > BATTERY_DRAIN_WINDOW:
+            self._sum(*self.samples.popleft(), -1)
+        return True
+
+    def _sum(self, t: float, y: float, sign: int) -> None:
+        t -= self._origin
+        self._n += sign
+        self._t += sign * t
+        self._y += sign * y
+        self._tt += sign * t * t
+        self._ty += sign * t * y
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self._origin = 0.0
+        self._n = 0
+        self._t = self._y = self._tt = self._ty = 0.0
+
+    @property
+    def last(self) -> float | None:
+        return self.samples[-1][1] if self.samples else None
+
+    def slope(self) -> float | None:
+        """Return the change per hour, None until the window spans enough."""
+        if self._n < 2 or self.samples[-1][0] - self.samples[0][0] < BATTERY_DRAIN_MIN_SPAN:
+            return None
+        mean_t = self._t / self._n
+        var = self._tt - self._n * mean_t * mean_t
+        if var <= 0:
+            return None
+        return (self._ty - mean_t * self._y) / var * 3600
+
+
+class BatteryDrain:
+    """Battery drain rate from the level and voltage over a sliding window.
+
+    The rates are the least squares slopes of the samples in the last
+    BATTERY_DRAIN_WINDOW seconds, positive while draining. The window starts
+    over when the battery level goes up, as the battery was charged.
+    """
+
+    def __init__(self) -> None:
+        self._level = _Trend()
+        self._voltage = _Trend()
+        # Percent and volts per hour.
+        self.rate: float | None = None
+        self.voltage_rate: float | None = None
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, return the updated key paths."""
+        if changes is not None and not any(map(_touches_battery, changes)):
+            return ()
+        level, voltage = device.battery_level, device.battery_voltage
+        if level is not None and self._level.last is not None and level > self._level.last:
+            # Charged, the drain is measured from the new level.
+            self._level.clear()
+            self._voltage.clear()
+        now = dt_util.utcnow().timestamp()
+        added = False
+        if level is not None:
+            added |= self._level.add(now, level)
+        if voltage is not None:
+            added |= self._voltage.add(now, voltage)
+        if not added:
+            return ()
+        self._update_rates()
+        return (KEY_BATTERY_DRAIN,)
+
+    def _update_rates(self) -> None:
+        self.rate = _negate(self._level.slope())
+        self.voltage_rate = _negate(self._voltage.slope())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "level": list(self._level.samples),
+            "voltage": list(self._voltage.samples),
+        }
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Continue from a saved state."""
+        if not data:
+            return
+        for t, value in data["level"]:
+            self._level.add(t, value)
+        for t, value in data["voltage"]:
+            self._voltage.add(t, value)
+        self._update_rates()
+
+
+def _negate(value: float | None) -> float | None:
+    return None if value is None else -value
+
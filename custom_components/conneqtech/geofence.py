@@ -0,0 +1,149 @@
+"""Geofences evaluated on ingest."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from math import cos, floor, radians
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    EVENT_GEOFENCE_ENTER,
+    EVENT_GEOFENCE_EXIT,
+    GEOFENCE_CELL_SIZE,
+    GEOFENCE_MAX_CELLS,
+    KEY_GEOFENCE,
+    LOGGER,
+)
+from .device import ConneqtechDevice
+from .geo import haversine
+from .trip import touches_location
+
+# Meters per degree of latitude.
+_METERS_PER_DEGREE = 111320.0
+
+
+@dataclass(frozen=True, slots=True)
+class Circle:
+    name: str
+    latitude: float
+    longitude: float
+    radius: float
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        dlat = self.radius / _METERS_PER_DEGREE
+        dlon = dlat / max(cos(radians(self.latitude)), 1e-6)
+        return (self.latitude - dlat, self.longitude - dlon,
+                self.latitude + dlat, self.longitude + dlon)
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return haversine(self.latitude, self.longitude, latitude, longitude) <= self.radius
+
+
+@dataclass(frozen=True, slots=True)
+class Polygon:
+    name: str
+    points: tuple[tuple[float, float], ...]
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        lats = [lat for lat, _ in self.points]
+        lons = [lon for _, lon in self.points]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Ray casting, fine for polygons that don't cross the antimeridian."""
+        inside = False
+        points = self.points
+        lat_j, lon_j = points[-1]
+        for lat_i, lon_i in points:
+            if (lat_i > latitude) != (lat_j > latitude) and longitude < (
+                (lon_j - lon_i) * (latitude - lat_i) / (lat_j - lat_i) + lon_i
+            ):
+                inside = not inside
+            lat_j, lon_j = lat_i, lon_i
+        return inside
+
+
+def parse_geofences(config: list[dict[str, Any]]) -> list[Circle | Polygon]:
+    """Return the shapes of validated geofence options."""
+    return [
+        Polygon(fence["name"], tuple(tuple(point) for point in fence["polygon"]))
+        if "polygon" in fence else
+        Circle(fence["name"], fence["latitude"],
+               fence["longitude"], fence["radius"])
+        for fence in config
+    ]
+
+
+class GeofenceIndex:
+    """Uniform grid over the bounding boxes of the geofences.
+
+    A lookup only tests the shapes registered in the grid cell of the
+    position. Shapes covering more than GEOFENCE_MAX_CELLS cells are tested
+    on every lookup instead of bloating the grid.
+    """
+
+    def __init__(self, fences: list[Circle | Polygon], cell_size: float = GEOFENCE_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self.fences = fences
+        grid: dict[tuple[int, int], list[Circle | Polygon]] = defaultdict(list)
+        self._large: list[Circle | Polygon] = []
+        for fence in fences:
+            min_lat, min_lon, max_lat, max_lon = fence.bounds()
+            rows = range(self._cell(min_lat), self._cell(max_lat) + 1)
+            cols = range(self._cell(min_lon), self._cell(max_lon) + 1)
+            if len(rows) * len(cols) > GEOFENCE_MAX_CELLS:
+                self._large.append(fence)
+                continue
+            for row in rows:
+                for col in cols:
+                    grid[row, col].append(fence)
+        self._grid = {cell: tuple(cell_fences) for cell, cell_fences in grid.items()}
+
+    def _cell(self, degrees: float) -> int:
+        return floor(degrees / self.cell_size)
+
+    def lookup(self, latitude: float, longitude: float) -> frozenset[str]:
+        """Return the names of the geofences containing a position."""
+        candidates = self._grid.get(
+            (self._cell(latitude), self._cell(longitude)), ())
+        return frozenset(
+            fence.name for fence in (*candidates, *self._large)
+            if fence.contains(latitude, longitude)
+        )
+
+
+class GeofenceMonitor:
+    """Fire enter and exit events when a device crosses a geofence."""
+
+    def __init__(self, hass: HomeAssistant, imei: str, index: GeofenceIndex) -> None:
+        self.hass = hass
+        self.imei = imei
+        self.index = index
+        self.inside: frozenset[str] | None = None
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, return the updated key paths."""
+        if changes is not None and not any(map(touches_location, changes)):
+            return ()
+        latitude, longitude = device.latitude, device.longitude
+        if latitude is None or longitude is None:
+            return ()
+        inside = self.index.lookup(latitude, longitude)
+        previous, self.inside = self.inside, inside
+        if previous is None:
+            # The first position sets the state, nothing was crossed.
+            return (KEY_GEOFENCE,)
+        if inside == previous:
+            return ()
+        fire = self.hass.bus.async_fire
+        for name in sorted(previous - inside):
+            LOGGER.debug(f"{self.imei} left geofence {name}")
+            fire(EVENT_GEOFENCE_EXIT, {"imei": self.imei, "geofence": name})
+        for name in sorted(inside - previous):
+            LOGGER.debug(f"{self.imei} entered geofence {name}")
+            fire(EVENT_GEOFENCE_ENTER, {"imei": self.imei, "geofence": name})
+        return (KEY_GEOFENCE,)
@@ -0,0 +1,68 @@
+"""Bounded ingest queue between the event streams and the coordinators."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+
+class IngestQueue:
+    """Coalescing queue of pending changes per device.
+
+    Changes of a device that is already queued are merged into its pending
+    batch, a newer value for the same key path replaces the older one. When
+    more than max_keys changes are pending, the oldest batches are dropped
+    and their devices returned, so they can be refreshed instead.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self.depth = 0
+        self.max_depth = 0
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def put(self, imei: str, changes: dict[str, Any]) -> list[str]:
+        """Queue the changes of a device, return the devices that were dropped."""
+        batch = self._pending.setdefault(imei, {})
+        for key, val in changes.items():
+            if key in batch:
+                # Move the key to the end, later changes must stay later.
+                del batch[key]
+                self.coalesced += 1
+            else:
+                self.depth += 1
+            batch[key] = val
+        self.enqueued += len(changes)
+
+        dropped = []
+        while self.depth > self.max_keys and len(self._pending) > 1:
+            oldest = next(iter(self._pending))
+            if oldest == imei:
+                # Keep the newest batch, drop the one behind it.
+                oldest = list(self._pending)[1]
+            self.depth -= len(self._pending.pop(oldest))
+            self.dropped += 1
+            dropped.append(oldest)
+
+        self.max_depth = max(self.max_depth, self.depth)
+        self._ready.set()
+        return dropped
+
+    async def async_get(self) -> tuple[str, dict[str, Any]]:
+        """Wait for and return the oldest pending batch."""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        imei = next(iter(self._pending))
+        batch = self._pending.pop(imei)
+        self.depth -= len(batch)
+        return imei, batch
+
+    def clear(self) -> None:
+        """Drop everything that is pending."""
+        self._pending.clear()
+        self.depth = 0
@@ -0,0 +1,99 @@
+"""Lightweight hot path metrics for the Conneqtech integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+# Upper bounds of the histogram buckets in milliseconds.
+LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets in milliseconds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Record one measurement."""
+        self.counts[bisect_left(LATENCY_BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def observe_since(self, start: float) -> None:
+        """Record the time passed since a time.perf_counter() start."""
+        self.observe((time.perf_counter() - start) * 1000)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        buckets = {f"le_{bound}": n for bound, n in zip(
+            LATENCY_BUCKETS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "max_ms": self.max,
+            "buckets": buckets,
+        }
+
+
+class EventRate:
+    """Events per minute, measured over the last full minute."""
+
+    __slots__ = ("total", "_window_start", "_window_count", "_rate")
+
+    def __init__(self) -> None:
+        self.total = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._rate = 0.0
+
+    def _roll(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed >= 60:
+            # An idle gap of several minutes counts as a zero rate.
+            self._rate = self._window_count * 60 / elapsed if elapsed < 120 else 0.0
+            self._window_start = now
+            self._window_count = 0
+
+    def hit(self, count: int = 1) -> None:
+        """Record events."""
+        self._roll(time.monotonic())
+        self.total += count
+        self._window_count += count
+
+    @property
+    def per_minute(self) -> float:
+        self._roll(time.monotonic())
+        return self._rate
+
+
+@dataclass
+class StreamMetrics:
+    """Metrics of the event streams of an account."""
+
+    events: EventRate = field(default_factory=EventRate)
+    decode_latency: Histogram = field(default_factory=Histogram)
+    # Events that could not be credited to a device.
+    decode_errors: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "events_total": self.events.total,
+            "events_per_minute": self.events.per_minute,
+            "decode_latency": self.decode_latency.as_dict(),
+            "decode_errors": self.decode_errors,
+        }
@@ -0,0 +1,54 @@
+"""Cumulative distance of Conneqtech devices."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+
+from .const import KEY_ODOMETER, ODOMETER_MIN_STEP
+from .device import ConneqtechDevice
+from .geo import haversine
+from .trip import touches_location
+
+
+class Odometer:
+    """Add up the distance between consecutive location fixes.
+
+    While the device stands still, GPS jitter smaller than
+    ODOMETER_MIN_STEP meters is not counted and does not move the reference
+    position, so a parked device does not creep forward.
+    """
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self._position: tuple[float, float] | None = None
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, return the updated key paths."""
+        if changes is not None and not any(map(touches_location, changes)):
+            return ()
+        latitude, longitude = device.latitude, device.longitude
+        if latitude is None or longitude is None:
+            return ()
+        if self._position is None:
+            self._position = (latitude, longitude)
+            return ()
+        step = haversine(*self._position, latitude, longitude)
+        if not step or (not device.speed and step < ODOMETER_MIN_STEP):
+            return ()
+        self._position = (latitude, longitude)
+        self.total += step
+        return (KEY_ODOMETER,)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"total": self.total, "position": self._position}
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Continue from a saved state."""
+        if not data:
+            return
+        self.total = data["total"]
+        if (position := data.get("position")) is not None:
+            self._position = tuple(position)
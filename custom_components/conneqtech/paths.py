@@ -0,0 +1,71 @@
+"""Compiled dot-separated key paths into the Conneqtech device data."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+
+class KeyPath:
+    """A dot-separated key path parsed once into its parts."""
+
+    __slots__ = ("key", "parts", "prefixes")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        # Each part keeps its list index, if it is one.
+        self.parts: tuple[tuple[str, int | None], ...] = tuple(
+            (part, int(part) if part.isdigit() else None)
+            for part in key.split(".")
+        )
+        self.prefixes: tuple[str, ...] = tuple(
+            ".".join(part for part, _ in self.parts[:i])
+            for i in range(1, len(self.parts))
+        )
+
+    def __repr__(self) -> str:
+        return f"KeyPath({self.key!r})"
+
+    def get(self, obj: Any) -> Any:
+        """Retrieve the value of this path from a nested object."""
+        for part, index in self.parts:
+            if type(obj) is dict:
+                obj = obj.get(part)
+            elif type(obj) is list:
+                if index is None or index >= len(obj):
+                    return None
+                obj = obj[index]
+            else:
+                return None
+        return obj
+
+    def set(self, obj: Any, value: Any) -> Any:
+        """Set the value of this path in a nested object."""
+        d = obj
+        for part, index in self.parts[:-1]:
+            if type(d) is dict:
+                d = d.setdefault(part, {})
+            elif type(d) is list:
+                if index is None:
+                    return obj
+                while len(d) <= index:
+                    d.append({})
+                d = d[index]
+            else:
+                return obj
+        part, index = self.parts[-1]
+        if type(d) is dict:
+            d[part] = value
+        elif type(d) is list:
+            if index is None:
+                return obj
+            while len(d) <= index:
+                d.append(None)
+            d[index] = value
+        return obj
+
+
+@lru_cache(maxsize=1024)
+def compile_path(key: str) -> KeyPath:
+    """Return the shared compiled path for a key."""
+    return KeyPath(key)
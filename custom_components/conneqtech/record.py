@@ -0,0 +1,160 @@
+"""Record and replay of raw Conneqtech stream traffic."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+from copy import deepcopy
+import gzip
+import json
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    INGEST_QUEUE_MAX_KEYS,
+    LOGGER,
+    RECORD_FLUSH_EVENTS,
+    RECORD_FLUSH_INTERVAL,
+)
+from .decode import ingest_event
+from .device import ConneqtechDevice
+from .ingest import IngestQueue
+from .metrics import StreamMetrics
+
+
+class StreamRecorder:
+    """Append raw stream events to a gzip compressed JSON lines file.
+
+    Every line holds [timestamp, event id, default IMEI, data]. Events are
+    buffered and written from the executor, each flush appends a new gzip
+    member, which gzip readers treat as one continuous file.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        self.hass = hass
+        self.path = path
+        self.recorded = 0
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._flushing: asyncio.Task | None = None
+
+    @callback
+    def async_record(self, event_id: str, default_imei: str | None, data: str) -> None:
+        """Buffer one raw event."""
+        self._buffer.append(json.dumps(
+            [time.time(), event_id, default_imei, data], separators=(",", ":")))
+        self.recorded += 1
+        if (
+            len(self._buffer) >= RECORD_FLUSH_EVENTS
+            or time.monotonic() - self._last_flush >= RECORD_FLUSH_INTERVAL
+        ) and self._flushing is None:
+            self._flushing = self.hass.async_create_background_task(
+                self.async_flush(), "Conneqtech IOT recorder flush")
+
+    async def async_flush(self) -> None:
+        """Write the buffered events."""
+        lines, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        try:
+            if lines:
+                await self.hass.async_add_executor_job(self._write, lines)
+        finally:
+            self._flushing = None
+
+    def _write(self, lines: list[str]) -> None:
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    async def async_close(self) -> None:
+        """Write what is left in the buffer."""
+        if self._flushing is not None:
+            await self._flushing
+        await self.async_flush()
+        LOGGER.info(f"Recorded {self.recorded} stream events to {self.path}")
+
+
+def read_recording(path: str) -> Iterator[tuple[float, str, str, str]]:
+    """Yield the timestamp, event id, default IMEI and data of each event."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                timestamp, event_id, default_imei, data = json.loads(line)
+                yield timestamp, event_id, default_imei, data
+
+
+async def async_replay(
+        hass: HomeAssistant,
+        path: str,
+        callback: Callable[[str, dict[str, Any]], None],
+        speed: float = 1.0,
+        metrics: StreamMetrics | None = None,
+) -> int:
+    """Feed a recording through the ingest pipeline, return the event count.
+
+    Events are spaced like they were recorded, divided by speed. A speed of
+    0 replays as fast as possible, only yielding to the event loop.
+    """
+    events = await hass.async_add_executor_job(
+        lambda: list(read_recording(path)))
+    if not events:
+        return 0
+
+    first = events[0][0]
+    start = time.monotonic()
+    for timestamp, _event_id, default_imei, data in events:
+        if speed > 0:
+            delay = (timestamp - first) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        ingest_event(data, default_imei, callback, metrics)
+    return len(events)
+
+
+class ReplaySink:
+    """Ingest pipeline of a replay, detached from the live devices.
+
+    Replayed events are decoded, queued and coalesced like live events, and
+    a consumer applies them to copies of the device snapshots. Devices
+    without a snapshot start empty. Entities, processors and the stored
+    state never see replayed data.
+    """
+
+    def __init__(self, devices: dict[str, ConneqtechDevice] | None = None) -> None:
+        self.devices = {
+            imei: ConneqtechDevice(deepcopy(device.raw))
+            for imei, device in (devices or {}).items()
+        }
+        self.queue = IngestQueue(INGEST_QUEUE_MAX_KEYS)
+        self.metrics = StreamMetrics()
+        self.applied = 0
+        self.dropped = 0
+
+    @callback
+    def async_enqueue(self, imei: str, changes: dict[str, Any]) -> None:
+        self.dropped += len(self.queue.put(imei, changes))
+
+    async def _async_consume(self) -> None:
+        while True:
+            imei, changes = await self.queue.async_get()
+            if (device := self.devices.get(imei)) is None:
+                device = self.devices[imei] = ConneqtechDevice({"imei": imei})
+            device.apply_changes(changes)
+            self.applied += len(changes)
+            await asyncio.sleep(0)
+
+    async def async_replay(self, hass: HomeAssistant, path: str, speed: float = 1.0) -> int:
+        """Replay a recording into the sink, return the event count."""
+        consumer = hass.async_create_background_task(
+            self._async_consume(), "Conneqtech IOT replay ingest")
+        try:
+            count = await async_replay(
+                hass, path, self.async_enqueue, speed, self.metrics)
+            while self.queue.depth:
+                await asyncio.sleep(0)
+        finally:
+            consumer.cancel()
+        return count
@@ -1,5 +1,8 @@
 from __future__ import annotations
-from typing import Any
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
@@ -14,14 +17,43 @@ from homeassistant.const import (
     UnitOfLength,
     UnitOfSpeed,
     UnitOfSoundPressure,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.importlib import async_import_module
 
-from .const import DOMAIN, LOGGER, get_nested_value, parse_datetime
+from .const import (
+    CONF_STATISTICS,
+    DEFAULT_STATISTICS,
+    DOMAIN,
+    LOGGER,
+    KEY_BATTERY_DRAIN,
+    KEY_GEOFENCE,
+    KEY_LOCATION,
+    KEY_ODOMETER,
+    KEY_STREAM_STATE,
+    KEY_TRIP,
+    KEY_UPDATE_MODE,
+    STATISTICS_STATE_INTERVAL,
+    STREAM_STATES,
+    UPDATE_MODES,
+    parse_datetime,
+)
+from .paths import compile_path
 from .cnt_device import CntDevice
-from .conneqtechapi import ConneqtechApi
+from .conneqtechapi import ConneqtechApi, UpdateStats
+from .discovery import SensorDiscovery
+from .drain import BatteryDrain
+from .odometer import Odometer
+from .trip import Trip, TripDetector
+
+if TYPE_CHECKING:
+    from .geofence import GeofenceMonitor
+
+# Only the metric sensors poll, they read counters that change on every event.
+SCAN_INTERVAL = timedelta(seconds=60)
 
 SENSORS: tuple[SensorEntityDescription, ...] = (
     # payload_state.tracker.metric.bbatp = battery level in percentage
@@ -93,34 +125,344 @@ SENSORS: tuple[SensorEntityDescription, ...] = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class ConneqtechMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a Conneqtech metric sensor."""
+
+    value_fn: Callable[[UpdateStats], Any]
+
+
+def _round(value: float | None, digits: int) -> float | None:
+    return None if value is None else round(value, digits)
+
+
+METRIC_SENSORS: tuple[ConneqtechMetricSensorEntityDescription, ...] = (
+    ConneqtechMetricSensorEntityDescription(
+        key="events_per_minute",
+        name="Event Rate",
+        native_unit_of_measurement="events/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _round(stats.events.per_minute, 1),
+    ),
+    ConneqtechMetricSensorEntityDescription(
+        key="last_event",
+        name="Last Event",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda stats: stats.last_event,
+    ),
+    ConneqtechMetricSensorEntityDescription(
+        key="notify_latency",
+        name="Update Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _round(stats.notify_latency.mean, 3),
+    ),
+    ConneqtechMetricSensorEntityDescription(
+        key="rest_latency",
+        name="REST Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _round(stats.rest_latency.mean, 1),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ConneqtechTripSensorEntityDescription(SensorEntityDescription):
+    """Describes a Conneqtech trip sensor."""
+
+    value_fn: Callable[[Trip], Any]
+
+
+TRIP_SENSORS: tuple[ConneqtechTripSensorEntityDescription, ...] = (
+    ConneqtechTripSensorEntityDescription(
+        key="trip_start",
+        name="Trip Start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda trip: trip.start,
+    ),
+    ConneqtechTripSensorEntityDescription(
+        key="trip_distance",
+        name="Trip Distance",
+        native_unit_of_measurement=UnitOfLength.KILOMETERS,
+        device_class=SensorDeviceClass.DISTANCE,
+        suggested_display_precision=2,
+        value_fn=lambda trip: trip.distance / 1000,
+    ),
+    ConneqtechTripSensorEntityDescription(
+        key="trip_duration",
+        name="Trip Duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        value_fn=lambda trip: trip.duration,
+    ),
+    ConneqtechTripSensorEntityDescription(
+        key="trip_max_speed",
+        name="Trip Maximum Speed",
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        device_class=SensorDeviceClass.SPEED,
+        value_fn=lambda trip: trip.max_speed,
+    ),
+    ConneqtechTripSensorEntityDescription(
+        key="trip_average_speed",
+        name="Trip Average Speed",
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        device_class=SensorDeviceClass.SPEED,
+        suggested_display_precision=1,
+        value_fn=lambda trip: trip.average_speed,
+    ),
+    ConneqtechTripSensorEntityDescription(
+        key="trip_elevation_gain",
+        name="Trip Elevation Gain",
+        native_unit_of_measurement=UnitOfLength.METERS,
+        device_class=SensorDeviceClass.DISTANCE,
+        suggested_display_precision=0,
+        value_fn=lambda trip: trip.elevation_gain,
+    ),
+)
+
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the sensor entities."""
     LOGGER.debug(f"Setting up sensor entities for {DOMAIN}")
 
-    coordinator: ConneqtechApi = hass.data[DOMAIN][
-        config_entry.entry_id
-    ].coordinator
+    runtime_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: ConneqtechApi = runtime_data.coordinator
 
+    statistics = ()
+    if config_entry.options.get(CONF_STATISTICS, DEFAULT_STATISTICS):
+        statistics = (await async_import_module(
+            hass, f"{__package__}.statistics")).STATISTICS
     entities = []
     for _, sensor in enumerate(SENSORS):
+        if sensor.key in statistics:
+            # Imported as external statistics, the state is only a preview.
+            entities.append(ConneqtechSensor(
+                replace(sensor, state_class=None), coordinator,
+                state_interval=STATISTICS_STATE_INTERVAL))
+            continue
         entities.append(ConneqtechSensor(sensor, coordinator))
+    entities.append(ConneqtechStreamStateSensor(coordinator))
+    entities.append(ConneqtechUpdateModeSensor(coordinator))
+    for description in METRIC_SENSORS:
+        entities.append(ConneqtechMetricSensor(description, coordinator))
+    for description in TRIP_SENSORS:
+        entities.append(ConneqtechTripSensor(
+            description, coordinator, runtime_data.trips))
+    entities.append(ConneqtechOdometerSensor(
+        coordinator, runtime_data.odometer))
+    entities.append(ConneqtechBatteryDrainSensor(
+        coordinator, runtime_data.battery_drain))
+    if runtime_data.geofences is not None:
+        entities.append(ConneqtechGeofenceSensor(
+            coordinator, runtime_data.geofences))
     async_add_entities(entities, update_before_add=False)
 
+    # Other payload leaves get a disabled sensor once they show up.
+    @callback
+    def async_add_discovered(descriptions: list[SensorEntityDescription]) -> None:
+        async_add_entities(
+            [ConneqtechSensor(description, coordinator)
+             for description in descriptions],
+            update_before_add=False,
+        )
+
+    discovery = SensorDiscovery(
+        (description.key for description in SENSORS), async_add_discovered)
+    config_entry.async_on_unload(
+        coordinator.async_add_processor(discovery.async_process))
+    discovery.async_process(coordinator.data, None)
+
 
 class ConneqtechSensor(CntDevice, SensorEntity):
-    def __init__(self, sensor, coordinator: ConneqtechApi) -> None:
-        super().__init__(coordinator)
+    def __init__(self, sensor, coordinator: ConneqtechApi, state_interval: float = 0) -> None:
+        super().__init__(coordinator, context=(sensor.key,))
         self.entity_description = sensor
+        self._state_interval = state_interval
+        self._path = compile_path(sensor.key)
+        self._throttle_location = KEY_LOCATION in self._path.prefixes
+        self._is_timestamp = sensor.device_class == SensorDeviceClass.TIMESTAMP
+        self._value: Any = None
+        self._value_version: int | None = None
         self._attr_unique_id = f"conneqtech-{
             coordinator.data.imei}-{sensor.key}"
 
     @property
     def native_value(self) -> Any:
         """Return the state of the sensor."""
-        if self.entity_description.device_class == SensorDeviceClass.TIMESTAMP:
-            return parse_datetime(get_nested_value(self.coordinator.data.raw, self.entity_description.key))
-        return get_nested_value(self.coordinator.data.raw, self.entity_description.key)
+        # Read once per data update, available and the state share it.
+        version = self.coordinator.data_version
+        if self._value_version != version:
+            value = self.coordinator.data.get(self._path)
+            # Known timestamps are parsed on ingest already.
+            if self._is_timestamp and isinstance(value, str):
+                value = parse_datetime(value)
+            self._value = value
+            self._value_version = version
+        return self._value
 
     @property
     def available(self) -> bool:
         return self.native_value is not None
+
+
+class ConneqtechStreamStateSensor(CntDevice, SensorEntity):
+    """Connection state of the event stream carrying the device."""
+
+    _attr_name = "Stream State"
+    _attr_icon = "mdi:lan-connect"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = STREAM_STATES
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: ConneqtechApi) -> None:
+        super().__init__(coordinator, context=(KEY_STREAM_STATE,))
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-stream-state"
+
+    @property
+    def native_value(self) -> str:
+        """Return the state of the stream."""
+        return self.coordinator.stream_state
+
+
+class ConneqtechUpdateModeSensor(CntDevice, SensorEntity):
+    """Whether the device is pushed by its stream or polled."""
+
+    _attr_name = "Update Mode"
+    _attr_icon = "mdi:swap-horizontal"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = UPDATE_MODES
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: ConneqtechApi) -> None:
+        super().__init__(coordinator, context=(KEY_UPDATE_MODE,))
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-update-mode"
+
+    @property
+    def native_value(self) -> str:
+        """Return the update mode."""
+        return self.coordinator.update_mode
+
+
+class ConneqtechMetricSensor(CntDevice, SensorEntity):
+    """Hot path metric of the device, disabled by default."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    entity_description: ConneqtechMetricSensorEntityDescription
+
+    def __init__(self, description: ConneqtechMetricSensorEntityDescription, coordinator: ConneqtechApi) -> None:
+        # Not woken by data updates, the metrics are polled instead.
+        super().__init__(coordinator, context=())
+        self.entity_description = description
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-metric-{description.key}"
+
+    @property
+    def should_poll(self) -> bool:
+        return True
+
+    async def async_update(self) -> None:
+        """Nothing to fetch, the value is read from the counters."""
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator.stats)
+
+
+class ConneqtechTripSensor(CntDevice, SensorEntity):
+    """Summary of the running trip, or of the last one while parked."""
+
+    entity_description: ConneqtechTripSensorEntityDescription
+
+    def __init__(self, description: ConneqtechTripSensorEntityDescription, coordinator: ConneqtechApi, trips: TripDetector) -> None:
+        super().__init__(coordinator, context=(KEY_TRIP,))
+        self.entity_description = description
+        self._trips = trips
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-{description.key}"
+
+    @property
+    def native_value(self) -> Any:
+        if (trip := self._trips.trip) is None:
+            return None
+        return self.entity_description.value_fn(trip)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"in_trip": self._trips.current is not None}
+
+
+class ConneqtechOdometerSensor(CntDevice, SensorEntity):
+    """Distance travelled, counted on ingest."""
+
+    _attr_name = "Odometer"
+    _attr_icon = "mdi:counter"
+    _attr_native_unit_of_measurement = UnitOfLength.KILOMETERS
+    _attr_device_class = SensorDeviceClass.DISTANCE
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator: ConneqtechApi, odometer: Odometer) -> None:
+        super().__init__(coordinator, context=(KEY_ODOMETER,))
+        self._odometer = odometer
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-odometer"
+
+    @property
+    def native_value(self) -> float:
+        return self._odometer.total / 1000
+
+
+class ConneqtechBatteryDrainSensor(CntDevice, SensorEntity):
+    """Battery drain rate over a sliding window."""
+
+    _attr_name = "Battery Drain Rate"
+    _attr_icon = "mdi:battery-arrow-down"
+    _attr_native_unit_of_measurement = "%/h"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 2
+
+    def __init__(self, coordinator: ConneqtechApi, battery_drain: BatteryDrain) -> None:
+        super().__init__(coordinator, context=(KEY_BATTERY_DRAIN,))
+        self._battery_drain = battery_drain
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-battery-drain"
+
+    @property
+    def native_value(self) -> float | None:
+        return self._battery_drain.rate
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        voltage_rate = self._battery_drain.voltage_rate
+        return {"voltage_rate": _round(voltage_rate, 4)}
+
+
+class ConneqtechGeofenceSensor(CntDevice, SensorEntity):
+    """Number of configured geofences the device is in."""
+
+    _attr_name = "Geofences"
+    _attr_icon = "mdi:map-marker-radius"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: ConneqtechApi, geofences: GeofenceMonitor) -> None:
+        super().__init__(coordinator, context=(KEY_GEOFENCE,))
+        self._geofences = geofences
+        self._attr_unique_id = f"conneqtech-{
+            coordinator.data.imei}-geofences"
+
+    @property
+    def native_value(self) -> int | None:
+        if (inside := self._geofences.inside) is None:
+            return None
+        return len(inside)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"geofences": sorted(self._geofences.inside or ())}
@@ -0,0 +1,138 @@
+"""Services of the Conneqtech integration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_IMEI,
+    CONF_PATH,
+    CONF_SINCE,
+    CONF_SPEED,
+    CONF_TOLERANCE,
+    DATA_STREAMS,
+    DEFAULT_TRACK_TOLERANCE,
+    DOMAIN,
+    LOGGER,
+    SERVICE_GET_TRACK,
+    SERVICE_REPLAY_RECORDING,
+    SERVICE_START_RECORDING,
+    SERVICE_STOP_RECORDING,
+)
+
+if TYPE_CHECKING:
+    from .stream import ConneqtechStreamManager
+
+START_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CLIENT_ID): cv.string,
+        vol.Optional(CONF_PATH): cv.string,
+    }
+)
+STOP_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CLIENT_ID): cv.string,
+    }
+)
+REPLAY_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CLIENT_ID): cv.string,
+        vol.Required(CONF_PATH): cv.string,
+        vol.Optional(CONF_SPEED, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+GET_TRACK_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_IMEI): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_TOLERANCE, default=DEFAULT_TRACK_TOLERANCE): vol.All(
+            vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_SINCE): cv.datetime,
+    }
+)
+
+
+def _managers(hass: HomeAssistant, call: ServiceCall) -> list[ConneqtechStreamManager]:
+    """Return the stream managers a service call applies to."""
+    managers: dict[str, ConneqtechStreamManager] = hass.data.get(
+        DATA_STREAMS, {})
+    if (client_id := call.data.get(CONF_CLIENT_ID)) is None:
+        return list(managers.values())
+    if client_id not in managers:
+        raise ServiceValidationError(f"No Conneqtech stream for {client_id}")
+    return [managers[client_id]]
+
+
+def _check_path(hass: HomeAssistant, path: str) -> str:
+    if not hass.config.is_allowed_path(path):
+        raise ServiceValidationError(f"Access to {path} is not allowed")
+    return path
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_start_recording(call: ServiceCall) -> None:
+        if (path := call.data.get(CONF_PATH)) is not None:
+            _check_path(hass, path)
+        for manager in _managers(hass, call):
+            # The generated default in the config directory is trusted.
+            manager.async_start_recording(path or hass.config.path(
+                f"conneqtech_{manager.api.client_id}_"
+                f"{dt_util.utcnow():%Y%m%d%H%M%S}.jsonl.gz"))
+
+    async def async_stop_recording(call: ServiceCall) -> None:
+        for manager in _managers(hass, call):
+            await manager.async_stop_recording()
+
+    async def async_replay_recording(call: ServiceCall) -> None:
+        path = _check_path(hass, call.data[CONF_PATH])
+        managers = _managers(hass, call)
+        if not managers:
+            raise ServiceValidationError("No Conneqtech stream to replay into")
+        sink = await managers[0].async_replay(path, call.data[CONF_SPEED])
+        LOGGER.info(
+            f"Replayed {sink.metrics.events.total} stream events from {path}, "
+            f"applied {sink.applied} changes to {len(sink.devices)} device copies")
+
+    async def async_get_track(call: ServiceCall) -> ServiceResponse:
+        imeis = call.data.get(CONF_IMEI)
+        since = call.data.get(CONF_SINCE)
+        if since is not None:
+            since = dt_util.as_utc(since).timestamp()
+        features = []
+        for runtime_data in hass.data.get(DOMAIN, {}).values():
+            imei = runtime_data.coordinator.data.imei
+            if imeis is not None and imei not in imeis:
+                continue
+            feature = runtime_data.track.as_geojson(
+                call.data[CONF_TOLERANCE], since)
+            feature["properties"]["imei"] = imei
+            features.append(feature)
+        return {"type": "FeatureCollection", "features": features}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_RECORDING, async_start_recording,
+        schema=START_RECORDING_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_STOP_RECORDING, async_stop_recording,
+        schema=STOP_RECORDING_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_REPLAY_RECORDING, async_replay_recording,
+        schema=REPLAY_RECORDING_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_TRACK, async_get_track,
+        schema=GET_TRACK_SCHEMA, supports_response=SupportsResponse.ONLY)
@@ -0,0 +1,77 @@
+"""Shared HTTP session for the Conneqtech integration."""
+
+from __future__ import annotations
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.util.ssl import client_context
+
+from .const import (
+    DATA_SESSION,
+    LOGGER,
+    SESSION_DNS_CACHE_TTL,
+    SESSION_KEEPALIVE_TIMEOUT,
+    SESSION_CONNECTION_LIMIT,
+)
+
+
+class ConneqtechSession:
+    """Reference counted session shared by REST calls and event streams.
+
+    One connector keeps connections alive, caches DNS lookups and reuses a
+    single TLS context, so reconnecting streams and REST calls don't repeat
+    the whole connection setup. The session is closed when the last config
+    entry releases it or when Home Assistant closes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.session = ClientSession(
+            connector=TCPConnector(
+                ssl=client_context(),
+                use_dns_cache=True,
+                ttl_dns_cache=SESSION_DNS_CACHE_TTL,
+                keepalive_timeout=SESSION_KEEPALIVE_TIMEOUT,
+                limit=SESSION_CONNECTION_LIMIT,
+                enable_cleanup_closed=True,
+            ),
+            # Streams never complete, REST calls pass their own timeout.
+            timeout=ClientTimeout(total=None, sock_connect=30),
+        )
+        self.users = 0
+        self._unsub_close: CALLBACK_TYPE = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_close_on_stop)
+
+    async def _async_close_on_stop(self, _event: Event) -> None:
+        self._unsub_close = None
+        await self.async_close()
+
+    async def async_close(self) -> None:
+        """Close the session and its connections."""
+        if self.hass.data.get(DATA_SESSION) is self:
+            del self.hass.data[DATA_SESSION]
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        if not self.session.closed:
+            LOGGER.debug("Closing Conneqtech session")
+            await self.session.close()
+
+
+@callback
+def async_acquire_session(hass: HomeAssistant) -> ClientSession:
+    """Return the shared session, it must be released on unload."""
+    if (shared := hass.data.get(DATA_SESSION)) is None:
+        shared = hass.data[DATA_SESSION] = ConneqtechSession(hass)
+    shared.users += 1
+    return shared.session
+
+
+async def async_release_session(hass: HomeAssistant) -> None:
+    """Release the shared session, closing it when it is no longer used."""
+    if (shared := hass.data.get(DATA_SESSION)) is None:
+        return
+    shared.users -= 1
+    if shared.users <= 0:
+        await shared.async_close()
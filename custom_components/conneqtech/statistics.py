@@ -0,0 +1,250 @@
+"""Long-term statistics of high-rate metrics."""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfElectricPotential, UnitOfSoundPressure, UnitOfSpeed
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import ElectricPotentialConverter, SpeedConverter
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:
+    # Before Home Assistant 2025.4 the metadata only has has_mean.
+    StatisticMeanType = None
+
+from .const import (
+    DOMAIN,
+    KEY_BATTERY_VOLTAGE,
+    LOGGER,
+    STATISTICS_BUCKET,
+)
+from .device import ConneqtechDevice
+
+# Key path: (statistic id suffix, name, unit, unit class) of the aggregated
+# metrics.
+STATISTICS: dict[str, tuple[str, str, str, str | None]] = {
+    "payload_state.tracker.loc.sp": (
+        "speed", "Speed", UnitOfSpeed.KILOMETERS_PER_HOUR,
+        SpeedConverter.UNIT_CLASS),
+    "payload_state.tracker.metric.rssi": (
+        "signal_strength", "Signal Strength", UnitOfSoundPressure.DECIBEL,
+        None),
+    KEY_BATTERY_VOLTAGE: (
+        "battery_voltage", "Battery Voltage", UnitOfElectricPotential.VOLT,
+        ElectricPotentialConverter.UNIT_CLASS),
+}
+
+_HOUR = 3600
+
+
+def statistic_metadata(statistic_id: str, name: str, unit: str, unit_class: str | None) -> StatisticMetaData:
+    """Return the metadata of a statistic with a mean, for this Home Assistant."""
+    metadata = StatisticMetaData(
+        has_sum=False,
+        name=name,
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement=unit,
+    )
+    if StatisticMeanType is None:
+        metadata["has_mean"] = True
+    else:
+        metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+    # The unit class is stored since Home Assistant 2025.10, older
+    # versions reject unknown keys.
+    if "unit_class" in StatisticMetaData.__annotations__:
+        metadata["unit_class"] = unit_class
+    return metadata
+
+
+class _Aggregate:
+    """Time weighted mean, minimum and maximum of a period."""
+
+    __slots__ = ("start", "weighted", "duration", "min", "max")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.weighted = 0.0
+        self.duration = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, value: float, duration: float) -> None:
+        self.weighted += value * duration
+        self.duration += duration
+        self.seen(value)
+
+    def seen(self, value: float) -> None:
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: _Aggregate) -> None:
+        self.weighted += other.weighted
+        self.duration += other.duration
+        if other.min is not None:
+            self.seen(other.min)
+            self.seen(other.max)
+
+    @property
+    def mean(self) -> float | None:
+        return self.weighted / self.duration if self.duration else None
+
+
+class _Metric:
+    """Running aggregation of one metric."""
+
+    __slots__ = ("value", "time", "bucket", "hour", "buckets", "rows")
+
+    def __init__(self) -> None:
+        self.value: float | None = None
+        self.time = 0.0
+        self.bucket: _Aggregate | None = None
+        self.hour: _Aggregate | None = None
+        # Closed buckets of the last hour, for diagnostics.
+        self.buckets: deque[_Aggregate] = deque(maxlen=_HOUR // STATISTICS_BUCKET)
+        self.rows: list[StatisticData] = []
+
+
+class StatisticsAggregator:
+    """Aggregate high-rate metrics into external long-term statistics.
+
+    Values are integrated over time into STATISTICS_BUCKET second buckets
+    with their mean, minimum and maximum. The buckets are rolled up into the
+    hourly rows of the long-term statistics, which are imported in one batch
+    per metric when the hour is over. A value is held until the next one
+    comes in, as the coordinator drops changes that repeat the last value.
+    """
+
+    def __init__(self, hass: HomeAssistant, imei: str) -> None:
+        self.hass = hass
+        self.imei = imei
+        self._metrics = {key: _Metric() for key in STATISTICS}
+        self.imported = 0
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Close buckets and import finished hours periodically."""
+        self._unsub = async_track_time_interval(
+            self.hass, self._async_flush, timedelta(seconds=STATISTICS_BUCKET))
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, the statistics have no listeners."""
+        if changes is None:
+            return ()
+        now = dt_util.utcnow().timestamp()
+        for key, value in changes.items():
+            if (metric := self._metrics.get(key)) is not None and type(value) in (int, float):
+                self._advance(metric, now)
+                metric.value = value
+                metric.time = now
+                if metric.bucket is not None:
+                    metric.bucket.seen(value)
+        return ()
+
+    def _advance(self, metric: _Metric, now: float) -> None:
+        """Integrate the held value up to now, closing finished buckets."""
+        if metric.value is None:
+            metric.bucket = _Aggregate(now - now % STATISTICS_BUCKET)
+            return
+        t = metric.time
+        while True:
+            bucket = metric.bucket
+            bucket_end = bucket.start + STATISTICS_BUCKET
+            if now < bucket_end:
+                bucket.add(metric.value, now - t)
+                break
+            bucket.add(metric.value, bucket_end - t)
+            self._close_bucket(metric)
+            t = bucket_end
+            if now == t:
+                break
+        metric.time = now
+
+    def _close_bucket(self, metric: _Metric) -> None:
+        bucket = metric.bucket
+        next_start = bucket.start + STATISTICS_BUCKET
+        metric.bucket = _Aggregate(next_start)
+        if metric.value is not None:
+            metric.bucket.seen(metric.value)
+        if not bucket.duration:
+            return
+        metric.buckets.append(bucket)
+        hour_start = bucket.start - bucket.start % _HOUR
+        if metric.hour is not None and metric.hour.start != hour_start:
+            self._close_hour(metric)
+        if metric.hour is None:
+            metric.hour = _Aggregate(hour_start)
+        metric.hour.merge(bucket)
+        if next_start % _HOUR == 0:
+            self._close_hour(metric)
+
+    def _close_hour(self, metric: _Metric) -> None:
+        hour, metric.hour = metric.hour, None
+        if hour is None or not hour.duration:
+            return
+        metric.rows.append(StatisticData(
+            start=dt_util.utc_from_timestamp(hour.start),
+            mean=hour.mean,
+            min=hour.min,
+            max=hour.max,
+        ))
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """Close finished buckets and import the finished hours."""
+        now = dt_util.utcnow().timestamp()
+        for key, metric in self._metrics.items():
+            if metric.bucket is not None:
+                self._advance(metric, now)
+            if not metric.rows:
+                continue
+            rows, metric.rows = metric.rows, []
+            suffix, name, unit, unit_class = STATISTICS[key]
+            async_add_external_statistics(
+                self.hass,
+                statistic_metadata(
+                    f"{DOMAIN}:{self.imei}_{suffix}",
+                    f"{self.imei} {name}",
+                    unit,
+                    unit_class,
+                ),
+                rows,
+            )
+            self.imported += len(rows)
+            LOGGER.debug(
+                f"Imported {len(rows)} hours of {name} of {self.imei}")
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "buckets": {
+                STATISTICS[key][0]: [
+                    {
+                        "start": dt_util.utc_from_timestamp(bucket.start).isoformat(),
+                        "mean": bucket.mean,
+                        "min": bucket.min,
+                        "max": bucket.max,
+                    }
+                    for bucket in metric.buckets
+                ]
+                for key, metric in self._metrics.items()
+            },
+        }
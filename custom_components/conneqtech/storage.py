@@ -0,0 +1,60 @@
+"""Persistent device snapshots for the Conneqtech integration."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from copy import deepcopy
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+
+class ConneqtechStore:
+    """Last known state of a device, saved with debounced writes."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._coordinator: DataUpdateCoordinator | None = None
+        self._extras: dict[str, Callable[[], Any]] = {}
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Return the saved snapshot, if any."""
+        return await self._store.async_load()
+
+    @callback
+    def async_track(
+            self,
+            coordinator: DataUpdateCoordinator,
+            extras: dict[str, Callable[[], Any]] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Save the coordinator data whenever it changed.
+
+        Extras map a key of the saved data to a function returning state
+        derived from the device, which is saved along with it.
+        """
+        self._coordinator = coordinator
+        self._extras = extras or {}
+        self.async_schedule_save()
+        return coordinator.async_add_listener(self.async_schedule_save)
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Schedule a save, updates within the delay are written once."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        # The raw payload keeps changing while the store writes it.
+        return {
+            "device": deepcopy(self._coordinator.data.raw),
+            **{key: dump() for key, dump in self._extras.items()},
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the saved snapshot."""
+        await self._store.async_remove()
@@ -0,0 +1,409 @@
+"""Account level event stream for Conneqtech devices."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DATA_STREAMS,
+    INGEST_QUEUE_MAX_KEYS,
+    LOGGER,
+    STREAM_BACKOFF_MAX,
+    STREAM_BACKOFF_MIN,
+    STREAM_CIRCUIT_COOLDOWN,
+    STREAM_CIRCUIT_THRESHOLD,
+    STREAM_IDLE_TIMEOUT,
+    STREAM_MAX_IMEIS,
+    STREAM_RESTART_DELAY,
+    STREAM_RESUME_WINDOW,
+    STREAM_STABLE_TIME,
+    STREAM_STATE_BACKOFF,
+    STREAM_STATE_CIRCUIT_OPEN,
+    STREAM_STATE_CONNECTED,
+    STREAM_STATE_CONNECTING,
+)
+from .conneqtechapi import ConneqtechApi
+from .ingest import IngestQueue
+from .metrics import StreamMetrics
+from .record import ReplaySink, StreamRecorder
+
+if TYPE_CHECKING:
+    from .conneqtechapi import Coordinator
+
+
+@callback
+def async_get_stream_manager(hass: HomeAssistant, api: ConneqtechApi) -> ConneqtechStreamManager:
+    """Return the stream manager shared by all devices of an account."""
+    managers: dict[str, ConneqtechStreamManager] = hass.data.setdefault(
+        DATA_STREAMS, {})
+    if (manager := managers.get(api.client_id)) is None:
+        manager = managers[api.client_id] = ConneqtechStreamManager(hass, api)
+    return manager
+
+
+class StreamSupervisor:
+    """Pace the reconnects of a stream connection.
+
+    Failed connections are retried with capped exponential backoff and
+    jitter. After STREAM_CIRCUIT_THRESHOLD consecutive failures the circuit
+    opens and a single attempt is made after STREAM_CIRCUIT_COOLDOWN.
+    """
+
+    def __init__(self, shard: StreamShard) -> None:
+        self.shard = shard
+        self.state = STREAM_STATE_CONNECTING
+        self.failures = 0
+        self.reconnects = 0
+        self._connected_at: float | None = None
+
+    @callback
+    def async_set_state(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            self.shard.manager.async_stream_state_changed(self.shard)
+
+    @callback
+    def async_connected(self) -> None:
+        """Record an opened connection."""
+        if self.failures:
+            LOGGER.info(
+                f"Stream {self.shard.name} reconnected after {self.failures} failures")
+        self._connected_at = time.monotonic()
+        self.async_set_state(STREAM_STATE_CONNECTED)
+
+    @callback
+    def async_disconnected(self, error: Exception | None) -> float:
+        """Record a closed connection, return the delay before reconnecting."""
+        connected_at, self._connected_at = self._connected_at, None
+        stable = connected_at is not None and (
+            time.monotonic() - connected_at >= STREAM_STABLE_TIME)
+        if connected_at is not None:
+            self.reconnects += 1
+        if stable:
+            self.failures = 0
+        # A connection the server closes right away is a failure as well,
+        # reconnecting immediately would spin.
+        if stable and (error is None or isinstance(error, TimeoutError)):
+            # A stable stream that was closed or went silent, reconnect
+            # right away.
+            LOGGER.debug(f"Stream {self.shard.name} closed: {error!r}")
+            self.async_set_state(STREAM_STATE_CONNECTING)
+            return 0
+
+        self.failures += 1
+        # Only the first failure in a row is worth an error in the log.
+        log = LOGGER.error if self.failures == 1 else LOGGER.debug
+        log(f"Stream {self.shard.name} failed ({self.failures}): {error!r}")
+
+        if self.failures >= STREAM_CIRCUIT_THRESHOLD:
+            self.async_set_state(STREAM_STATE_CIRCUIT_OPEN)
+            return STREAM_CIRCUIT_COOLDOWN
+
+        delay = min(STREAM_BACKOFF_MAX,
+                    STREAM_BACKOFF_MIN * 2 ** (self.failures - 1))
+        self.async_set_state(STREAM_STATE_BACKOFF)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+class StreamShard:
+    """A single event stream connection carrying a group of IMEIs."""
+
+    def __init__(self, manager: ConneqtechStreamManager, index: int) -> None:
+        self.manager = manager
+        self.index = index
+        self.name = f"{manager.api.client_id}/{index}"
+        self.imeis: set[str] = set()
+        self.supervisor = StreamSupervisor(self)
+        self.last_event_id: str | None = None
+        # Monotonic time of the last event, whether it carried an id or not.
+        self.last_event_at: float | None = None
+        self._opened_at: float | None = None
+        self._closed_at: float | None = None
+        self._task: asyncio.Task | None = None
+        self._cancel_restart: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_schedule_restart(self) -> None:
+        """Restart the connection once the IMEI set has settled."""
+        if self._cancel_restart is not None:
+            self._cancel_restart()
+        self._cancel_restart = async_call_later(
+            self.manager.hass, STREAM_RESTART_DELAY, self._async_restart)
+
+    @callback
+    def _async_restart(self, _now=None) -> None:
+        self._cancel_restart = None
+        self._async_cancel_task()
+        if not self.imeis:
+            return
+        imeis = sorted(self.imeis)
+        LOGGER.debug(f"Starting stream shard {self.name} for {imeis}")
+        self._task = self.manager.hass.async_create_background_task(
+            self._async_run(imeis),
+            name=f"Conneqtech IOT stream {self.name}",
+        )
+
+    async def _async_run(self, imeis: list[str]) -> None:
+        """Keep the connection open until cancelled."""
+        supervisor = self.supervisor
+        while True:
+            supervisor.async_set_state(STREAM_STATE_CONNECTING)
+            error = None
+            try:
+                await self.manager.api.async_connect(
+                    imeis,
+                    self.manager.async_enqueue,
+                    on_open=partial(self._async_opened, imeis),
+                    idle_timeout=STREAM_IDLE_TIMEOUT,
+                    last_event_id=self.last_event_id,
+                    on_event=self._async_event_received,
+                    metrics=self.manager.metrics,
+                    on_raw_event=self.manager.async_record,
+                )
+            except Exception as e:
+                error = e
+            self._async_mark_closed(error)
+            await asyncio.sleep(supervisor.async_disconnected(error))
+
+    @callback
+    def _async_event_received(self, event_id: str | None) -> None:
+        self.last_event_at = time.monotonic()
+        if event_id:
+            self.last_event_id = event_id
+
+    @callback
+    def _async_mark_closed(self, error: Exception | None = None) -> None:
+        """Remember since when events may have been lost."""
+        if self._opened_at is None or self._closed_at is not None:
+            return
+        if error is None or isinstance(error, TimeoutError):
+            # Ended by the server, a restart or the idle timeout, nothing
+            # was missed until now.
+            self._closed_at = time.monotonic()
+        else:
+            # A dropped connection may have lost what came after the last
+            # received event.
+            self._closed_at = max(self.last_event_at or 0, self._opened_at)
+
+    @callback
+    def _async_opened(self, imeis: list[str]) -> None:
+        """Handle an opened connection, backfill when events may be lost."""
+        self.supervisor.async_connected()
+        self._opened_at = time.monotonic()
+        closed_at, self._closed_at = self._closed_at, None
+        if closed_at is None:
+            # First connection, the REST snapshot is recent.
+            return
+        gap = self._opened_at - closed_at
+        if gap <= STREAM_RESUME_WINDOW:
+            # A routine reconnect, the server resumes after the last id if
+            # it sent one.
+            LOGGER.debug(
+                f"Stream {self.name} resuming after {self.last_event_id}")
+            return
+        LOGGER.debug(
+            f"Stream {self.name} missed {gap:.0f}s of events, backfilling")
+        self.manager.async_backfill(imeis)
+
+    @callback
+    def _async_cancel_task(self) -> None:
+        if self._task is not None:
+            self._async_mark_closed()
+            self._task.cancel()
+            self._task = None
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the connection."""
+        if self._cancel_restart is not None:
+            self._cancel_restart()
+            self._cancel_restart = None
+        self._async_cancel_task()
+
+
+class ConneqtechStreamManager:
+    """Multiplex the event streams of all devices of one account.
+
+    The stream endpoint accepts a list of IMEIs, so devices are grouped in
+    shards of at most STREAM_MAX_IMEIS and every shard holds one connection.
+    Adding or removing a device only reconnects the shard it belongs to.
+
+    Readers only put changes on a bounded ingest queue, a single consumer
+    task hands them to the coordinators. A slow listener never stalls the
+    socket reads and bursts are coalesced per key path.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: ConneqtechApi) -> None:
+        self.hass = hass
+        self.api = api
+        self.queue = IngestQueue(INGEST_QUEUE_MAX_KEYS)
+        self.metrics = StreamMetrics()
+        self.recorder: StreamRecorder | None = None
+        self._coordinators: dict[str, Coordinator] = {}
+        self._shards: list[StreamShard] = []
+        self._consumer: asyncio.Task | None = None
+
+    @callback
+    def async_add_device(self, imei: str, coordinator: Coordinator) -> CALLBACK_TYPE:
+        """Route the events of a device to its coordinator, return a remove function."""
+        self._coordinators[imei] = coordinator
+        if self._consumer is None:
+            self._consumer = self.hass.async_create_background_task(
+                self._async_consume(),
+                name=f"Conneqtech IOT ingest {self.api.client_id}",
+            )
+        shard = self._shard_for(imei)
+        if shard is None:
+            shard = next(
+                (s for s in self._shards if len(s.imeis) < STREAM_MAX_IMEIS), None)
+        if shard is None:
+            shard = StreamShard(self, len(self._shards))
+            self._shards.append(shard)
+        shard.imeis.add(imei)
+        shard.async_schedule_restart()
+        coordinator.async_set_stream_state(shard.supervisor.state)
+
+        @callback
+        def remove_device() -> None:
+            self._async_remove_device(imei, coordinator)
+
+        return remove_device
+
+    @callback
+    def _async_remove_device(self, imei: str, coordinator: Coordinator) -> None:
+        if self._coordinators.get(imei) is not coordinator:
+            return
+        del self._coordinators[imei]
+        if (shard := self._shard_for(imei)) is not None:
+            shard.imeis.discard(imei)
+            shard.async_schedule_restart()
+        if not self._coordinators:
+            self.async_stop()
+
+    def _shard_for(self, imei: str) -> StreamShard | None:
+        return next((s for s in self._shards if imei in s.imeis), None)
+
+    @callback
+    def async_enqueue(self, imei: str, changes: dict[str, Any]) -> None:
+        """Queue the changes of an event for the consumer."""
+        if dropped := self.queue.put(imei, changes):
+            LOGGER.debug(f"Ingest queue full, dropped changes of {dropped}")
+            self.async_backfill(dropped)
+
+    async def _async_consume(self) -> None:
+        """Hand queued changes to the coordinators."""
+        while True:
+            imei, changes = await self.queue.async_get()
+            try:
+                self.async_dispatch(imei, changes)
+            except Exception:
+                # One bad update must not stop the ingest of every device.
+                LOGGER.exception(f"Error handling the changes of {imei}")
+            # Give the readers and the rest of Home Assistant a turn.
+            await asyncio.sleep(0)
+
+    @callback
+    def async_dispatch(self, imei: str, changes: dict[str, Any]) -> None:
+        """Route the changes of an event to the device it belongs to."""
+        if (coordinator := self._coordinators.get(imei)) is not None:
+            coordinator.update_data(changes)
+
+    @callback
+    def async_backfill(self, imeis: list[str]) -> None:
+        """Refresh devices whose stream events may have been lost."""
+        for imei in imeis:
+            if (coordinator := self._coordinators.get(imei)) is not None:
+                self.hass.async_create_task(
+                    coordinator.async_request_refresh(),
+                    f"Conneqtech IOT backfill {imei}",
+                )
+
+    @callback
+    def async_stream_state_changed(self, shard: StreamShard) -> None:
+        """Tell the devices of a shard about its new connection state."""
+        for imei in shard.imeis:
+            if (coordinator := self._coordinators.get(imei)) is not None:
+                coordinator.async_set_stream_state(shard.supervisor.state)
+
+    @callback
+    def async_record(self, event_id: str, default_imei: str | None, data: str) -> None:
+        """Pass a raw event to the recorder, if recording."""
+        if self.recorder is not None:
+            self.recorder.async_record(event_id, default_imei, data)
+
+    @callback
+    def async_start_recording(self, path: str) -> None:
+        """Start capturing the raw events of all shards."""
+        if self.recorder is None:
+            LOGGER.info(f"Recording stream {self.api.client_id} to {path}")
+            self.recorder = StreamRecorder(self.hass, path)
+
+    async def async_stop_recording(self) -> None:
+        """Stop capturing and write the remaining events."""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            await recorder.async_close()
+
+    async def async_replay(self, path: str, speed: float) -> ReplaySink:
+        """Replay a recording on copies of the devices of this account.
+
+        The live coordinators, entities and stored state are not touched.
+        """
+        sink = ReplaySink({
+            imei: coordinator.data
+            for imei, coordinator in self._coordinators.items()
+            if coordinator.data is not None
+        })
+        await sink.async_replay(self.hass, path, speed)
+        return sink
+
+    @callback
+    def async_diagnostics(self) -> dict[str, Any]:
+        """Return the state and metrics of the streams of this account."""
+        return {
+            "devices": len(self._coordinators),
+            "shards": [
+                {
+                    "index": shard.index,
+                    "devices": len(shard.imeis),
+                    "state": shard.supervisor.state,
+                    "failures": shard.supervisor.failures,
+                    "reconnects": shard.supervisor.reconnects,
+                    "last_event_id": shard.last_event_id,
+                }
+                for shard in self._shards
+            ],
+            "queue": {
+                "depth": self.queue.depth,
+                "max_depth": self.queue.max_depth,
+                "enqueued": self.queue.enqueued,
+                "coalesced": self.queue.coalesced,
+                "dropped": self.queue.dropped,
+            },
+            "metrics": self.metrics.as_dict(),
+            "recording": self.recorder.path if self.recorder is not None else None,
+        }
+
+    @callback
+    def async_stop(self) -> None:
+        """Close all connections and forget this account."""
+        for shard in self._shards:
+            shard.async_stop()
+        self._shards.clear()
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+        self.queue.clear()
+        if self.recorder is not None:
+            self.hass.async_create_task(
+                self.async_stop_recording(), "Conneqtech IOT recorder close")
+        managers = self.hass.data.get(DATA_STREAMS, {})
+        if managers.get(self.api.client_id) is self:
+            del managers[self.api.client_id]
@@ -0,0 +1,124 @@
+"""Rate limiting of location state writes."""
+
+from __future__ import annotations
+
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import LOCATION_FLUSH_DELAY
+from .device import ConneqtechDevice
+from .geo import haversine
+
+
+class LocationThrottle:
+    """Limit how often a moving device writes its location state.
+
+    While the device moves, a state is written when both min_interval
+    seconds passed and it moved min_distance meters since the last write.
+    Skipped updates are flushed once the device stops or no update came in
+    for min_interval seconds, or LOCATION_FLUSH_DELAY seconds without an
+    interval, so the end of a trip is always written.
+    """
+
+    def __init__(self, hass: HomeAssistant, min_interval: float, min_distance: float, write: CALLBACK_TYPE) -> None:
+        self.hass = hass
+        self.min_interval = min_interval
+        self.min_distance = min_distance
+        self._write = write
+        self._last_write: float | None = None
+        self._last_position: tuple[float, float] | None = None
+        self._pending_position: tuple[float | None, float | None] | None = None
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self.skipped = 0
+
+    @callback
+    def async_update(self, device: ConneqtechDevice) -> None:
+        """Write the state now or schedule a trailing write."""
+        self.async_cancel()
+        now = time.monotonic()
+        position = (device.latitude, device.longitude)
+        if (
+            not device.speed
+            or self._last_write is None
+            or (
+                now - self._last_write >= self.min_interval
+                and self._distance(position) >= self.min_distance
+            )
+        ):
+            self._async_write(now, position)
+            return
+
+        self.skipped += 1
+        self._pending_position = position
+        self._cancel_flush = async_call_later(
+            self.hass, self.min_interval or LOCATION_FLUSH_DELAY, self._async_flush)
+
+    def _distance(self, position: tuple[float | None, float | None]) -> float:
+        if self._last_position is None or None in position:
+            return float("inf")
+        return haversine(*self._last_position, *position)
+
+    @callback
+    def _async_flush(self, _now) -> None:
+        self._cancel_flush = None
+        self._async_write(time.monotonic(), self._pending_position)
+
+    @callback
+    def _async_write(self, now: float, position: tuple[float | None, float | None]) -> None:
+        self._last_write = now
+        self._pending_position = None
+        if None not in position:
+            self._last_position = position
+        self._write()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel a pending trailing write."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+
+
+class StateThrottle:
+    """Write a state at most once every min_interval seconds.
+
+    Updates within the interval are coalesced into one trailing write at
+    the end of it.
+    """
+
+    def __init__(self, hass: HomeAssistant, min_interval: float, write: CALLBACK_TYPE) -> None:
+        self.hass = hass
+        self.min_interval = min_interval
+        self._write = write
+        self._last_write: float | None = None
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self.skipped = 0
+
+    @callback
+    def async_update(self) -> None:
+        """Write the state now or schedule a trailing write."""
+        if self._cancel_flush is not None:
+            self.skipped += 1
+            return
+        now = time.monotonic()
+        if self._last_write is None or now - self._last_write >= self.min_interval:
+            self._async_write()
+            return
+        self.skipped += 1
+        self._cancel_flush = async_call_later(
+            self.hass, self.min_interval - (now - self._last_write), self._async_write)
+
+    @callback
+    def _async_write(self, _now=None) -> None:
+        self._cancel_flush = None
+        self._last_write = time.monotonic()
+        self._write()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel a pending trailing write."""
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
@@ -0,0 +1,137 @@
+"""Compact history of recent location fixes."""
+
+from __future__ import annotations
+
+from array import array
+from math import cos, hypot, radians
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import TRACK_CAPACITY, TRACK_MAX_GAP, TRACK_MIN_DISTANCE
+from .device import ConneqtechDevice
+from .geo import EARTH_RADIUS, haversine
+from .trip import touches_location
+
+
+class TrackBuffer:
+    """Ring buffer of the most recent location fixes of a device.
+
+    Latitude, longitude, timestamp and speed are kept in typed arrays of
+    capacity entries, about 32 bytes per fix. Fixes closer than
+    TRACK_MIN_DISTANCE meters to the previous one are only kept after
+    TRACK_MAX_GAP seconds, so a parked device does not fill the buffer.
+    """
+
+    def __init__(self, capacity: int = TRACK_CAPACITY) -> None:
+        self.capacity = capacity
+        self.latitude = array("d", bytes(8 * capacity))
+        self.longitude = array("d", bytes(8 * capacity))
+        self.timestamp = array("d", bytes(8 * capacity))
+        self.speed = array("f", bytes(4 * capacity))
+        # Index of the next fix to write and the number of fixes kept.
+        self._head = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, the track has no listeners."""
+        if changes is not None and not any(map(touches_location, changes)):
+            return ()
+        latitude, longitude = device.latitude, device.longitude
+        if latitude is not None and longitude is not None:
+            when = device.last_location_date or dt_util.utcnow()
+            self.add(latitude, longitude, when.timestamp(), device.speed or 0.0)
+        return ()
+
+    def add(self, latitude: float, longitude: float, timestamp: float, speed: float) -> bool:
+        """Append a fix, return whether it was kept."""
+        if self.size:
+            last = (self._head - 1) % self.capacity
+            if timestamp <= self.timestamp[last]:
+                return False
+            if (
+                timestamp - self.timestamp[last] < TRACK_MAX_GAP
+                and haversine(self.latitude[last], self.longitude[last],
+                              latitude, longitude) < TRACK_MIN_DISTANCE
+            ):
+                return False
+        head = self._head
+        self.latitude[head] = latitude
+        self.longitude[head] = longitude
+        self.timestamp[head] = timestamp
+        self.speed[head] = speed
+        self._head = (head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def _indices(self, since: float | None) -> list[int]:
+        """Return the buffer indices of the fixes, oldest first."""
+        start = (self._head - self.size) % self.capacity
+        indices = [(start + i) % self.capacity for i in range(self.size)]
+        if since is not None:
+            indices = [i for i in indices if self.timestamp[i] >= since]
+        return indices
+
+    def as_geojson(self, tolerance: float = 0, since: float | None = None) -> dict[str, Any]:
+        """Return the track as a GeoJSON LineString feature.
+
+        With a tolerance in meters the line is simplified with
+        Douglas-Peucker, keeping the timestamps and speeds of the kept fixes.
+        """
+        indices = self._indices(since)
+        if tolerance > 0:
+            indices = self._simplify(indices, tolerance)
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [
+                    [self.longitude[i], self.latitude[i]] for i in indices
+                ],
+            },
+            "properties": {
+                "timestamps": [
+                    dt_util.utc_from_timestamp(self.timestamp[i]).isoformat()
+                    for i in indices
+                ],
+                "speeds": [round(self.speed[i], 1) for i in indices],
+            },
+        }
+
+    def _simplify(self, indices: list[int], tolerance: float) -> list[int]:
+        """Douglas-Peucker on a local flat projection, without recursion."""
+        if len(indices) < 3:
+            return indices
+        # Meters per degree around the first fix, fine for a local track.
+        lat0 = self.latitude[indices[0]]
+        y_scale = radians(1) * EARTH_RADIUS
+        x_scale = y_scale * cos(radians(lat0))
+        xs = [self.longitude[i] * x_scale for i in indices]
+        ys = [self.latitude[i] * y_scale for i in indices]
+
+        keep = bytearray(len(indices))
+        keep[0] = keep[-1] = 1
+        stack = [(0, len(indices) - 1)]
+        while stack:
+            first, last = stack.pop()
+            dx, dy = xs[last] - xs[first], ys[last] - ys[first]
+            length = hypot(dx, dy)
+            max_distance, farthest = 0.0, 0
+            for k in range(first + 1, last):
+                if length:
+                    distance = abs(
+                        dy * (xs[k] - xs[first]) - dx * (ys[k] - ys[first])) / length
+                else:
+                    distance = hypot(xs[k] - xs[first], ys[k] - ys[first])
+                if distance > max_distance:
+                    max_distance, farthest = distance, k
+            if max_distance > tolerance:
+                keep[farthest] = 1
+                stack.append((first, farthest))
+                stack.append((farthest, last))
+        return [index for index, kept in zip(indices, keep) if kept]
@@ -0,0 +1,225 @@
+"""Streaming trip detection for Conneqtech devices."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    EVENT_TRIP_ENDED,
+    KEY_LOCATION,
+    KEY_TRIP,
+    LOGGER,
+    TRIP_ELEVATION_THRESHOLD,
+)
+from .device import ConneqtechDevice
+from .geo import haversine
+from .paths import compile_path
+
+
+@lru_cache(maxsize=512)
+def touches_location(key: str) -> bool:
+    """Return whether a change of a key path may move the device."""
+    path = compile_path(key)
+    return (
+        key == KEY_LOCATION
+        or KEY_LOCATION in path.prefixes
+        or key in compile_path(KEY_LOCATION).prefixes
+    )
+
+
+@dataclass(slots=True)
+class Trip:
+    """Running summary of a trip."""
+
+    start: datetime
+    start_latitude: float
+    start_longitude: float
+    end: datetime
+    end_latitude: float
+    end_longitude: float
+    # Meters, km/h and meters.
+    distance: float = 0.0
+    max_speed: float = 0.0
+    elevation_gain: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Return the duration in seconds."""
+        return (self.end - self.start).total_seconds()
+
+    @property
+    def average_speed(self) -> float:
+        """Return the average speed in km/h."""
+        duration = self.duration
+        return self.distance / duration * 3.6 if duration > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "start_latitude": self.start_latitude,
+            "start_longitude": self.start_longitude,
+            "end_latitude": self.end_latitude,
+            "end_longitude": self.end_longitude,
+            "distance": round(self.distance / 1000, 3),
+            "duration": round(self.duration),
+            "max_speed": self.max_speed,
+            "average_speed": round(self.average_speed, 1),
+            "elevation_gain": round(self.elevation_gain, 1),
+        }
+
+
+class TripDetector:
+    """Detect trips from the location updates of a device.
+
+    A trip starts when the speed reaches min_speed and ends once the device
+    stayed below it, or sent no fix, for idle_time seconds. This is told by
+    the fix times of the updates or, when the device goes quiet, by a timer. Only the running
+    trip, the last trip and the previous fix are kept, so every update is
+    handled in constant time and memory.
+    """
+
+    def __init__(self, hass: HomeAssistant, imei: str, min_speed: float, idle_time: float, publish: Callable[[Iterable[str]], None]) -> None:
+        self.hass = hass
+        self.imei = imei
+        self.min_speed = min_speed
+        self.idle_time = idle_time
+        self._publish = publish
+        self.current: Trip | None = None
+        self.last: Trip | None = None
+        self._last_fix: tuple[datetime, float, float] | None = None
+        self._stopped_since: datetime | None = None
+        self._altitude_ref: float | None = None
+        self._cancel_idle: CALLBACK_TYPE | None = None
+
+    @property
+    def trip(self) -> Trip | None:
+        """Return the running trip, or the last one while parked."""
+        return self.current or self.last
+
+    @callback
+    def async_process(self, device: ConneqtechDevice, changes: dict[str, Any] | None) -> tuple[str, ...]:
+        """Feed a data change, return the updated key paths."""
+        if changes is not None and not any(map(touches_location, changes)):
+            return ()
+        if not self.async_update(device):
+            return ()
+        return (KEY_TRIP,)
+
+    @callback
+    def async_update(self, device: ConneqtechDevice) -> bool:
+        """Handle a location fix, return whether the trips changed."""
+        latitude, longitude = device.latitude, device.longitude
+        if latitude is None or longitude is None:
+            return False
+        when = device.last_location_date or dt_util.utcnow()
+        last_fix = self._last_fix
+        if last_fix is not None and when <= last_fix[0]:
+            # Resent or out of order fix.
+            return False
+        self._last_fix = (when, latitude, longitude)
+        speed = device.speed or 0.0
+        moving = speed >= self.min_speed
+
+        trip = self.current
+        ended = False
+        if last_fix is not None and (when - last_fix[0]).total_seconds() > self.idle_time:
+            # Quiet for longer than a stop, a running trip ended at its last
+            # fix and a new one starts here.
+            if trip is not None:
+                self._async_end_trip()
+                trip, ended = None, True
+            last_fix = None
+
+        if trip is None:
+            if not moving:
+                return ended
+            # The device left from the previous fix.
+            start = last_fix or self._last_fix
+            trip = self.current = Trip(
+                start[0], start[1], start[2], when, latitude, longitude)
+            self._altitude_ref = device.altitude
+            if last_fix is not None:
+                trip.distance = haversine(
+                    last_fix[1], last_fix[2], latitude, longitude)
+            trip.max_speed = speed
+            self._async_arm_idle()
+            LOGGER.debug(f"Trip of {self.imei} started")
+            return True
+
+        trip.distance += haversine(
+            trip.end_latitude, trip.end_longitude, latitude, longitude)
+        trip.end = when
+        trip.end_latitude = latitude
+        trip.end_longitude = longitude
+        if speed > trip.max_speed:
+            trip.max_speed = speed
+        self._add_altitude(trip, device.altitude)
+
+        if moving:
+            self._stopped_since = None
+        elif self._stopped_since is None:
+            self._stopped_since = when
+        elif (when - self._stopped_since).total_seconds() >= self.idle_time:
+            self._async_end_trip()
+            return True
+        self._async_arm_idle()
+        return True
+
+    def _add_altitude(self, trip: Trip, altitude: float | None) -> None:
+        """Count climbs, ignoring GPS altitude noise below the threshold."""
+        if altitude is None:
+            return
+        reference = self._altitude_ref
+        if reference is None or altitude < reference:
+            self._altitude_ref = altitude
+        elif altitude - reference >= TRIP_ELEVATION_THRESHOLD:
+            trip.elevation_gain += altitude - reference
+            self._altitude_ref = altitude
+
+    @callback
+    def _async_idle(self, _now) -> None:
+        """End the trip of a device that stopped reporting."""
+        self._cancel_idle = None
+        if self.current is not None:
+            self._async_end_trip()
+            self._publish((KEY_TRIP,))
+
+    @callback
+    def _async_end_trip(self) -> None:
+        trip, self.current = self.current, None
+        self._async_cancel_idle()
+        # The trip ended when the device stopped, not when that was noticed.
+        if self._stopped_since is not None and self._stopped_since > trip.start:
+            trip.end = self._stopped_since
+        self._stopped_since = None
+        self.last = trip
+        LOGGER.debug(f"Trip of {self.imei} ended: {trip}")
+        self.hass.bus.async_fire(
+            EVENT_TRIP_ENDED, {"imei": self.imei, **trip.as_dict()})
+
+    @callback
+    def _async_arm_idle(self) -> None:
+        """End the trip when no fix comes in for idle_time seconds."""
+        self._async_cancel_idle()
+        self._cancel_idle = async_call_later(
+            self.hass, self.idle_time, self._async_idle)
+
+    @callback
+    def _async_cancel_idle(self) -> None:
+        if self._cancel_idle is not None:
+            self._cancel_idle()
+            self._cancel_idle = None
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the idle timer."""
+        self._async_cancel_idle()
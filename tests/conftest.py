@@ -0,0 +1,20 @@
+"""Fixtures for the Conneqtech tests."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(request: pytest.FixtureRequest):
+    """Load the integration from custom_components."""
+    if "recorder_mock" in request.fixturenames:
+        # The recorder must be set up before hass.
+        request.getfixturevalue("recorder_mock")
+    request.getfixturevalue("enable_custom_integrations")
+    yield
@@ -0,0 +1,72 @@
+"""Tests of the write throttling of Conneqtech entities."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.conneqtech.cnt_device import CntDevice
+from custom_components.conneqtech.const import (
+    CONF_LOCATION_DISTANCE,
+    CONF_LOCATION_INTERVAL,
+)
+
+
+class LocationEntity(CntDevice):
+    """A location entity counting its state writes."""
+
+    _throttle_location = True
+
+    def __init__(self, coordinator, state_interval: float = 0) -> None:
+        super().__init__(coordinator)
+        self._state_interval = state_interval
+        self.writes = 0
+
+    def async_write_ha_state(self) -> None:
+        self.writes += 1
+
+
+def _coordinator() -> MagicMock:
+    coordinator = MagicMock()
+    coordinator.config_entry.options = {
+        CONF_LOCATION_INTERVAL: 10,
+        CONF_LOCATION_DISTANCE: 50,
+    }
+    coordinator.data.speed = 20
+    coordinator.data.latitude = 52.0907
+    coordinator.data.longitude = 5.1214
+    return coordinator
+
+
+async def _async_add(hass: HomeAssistant, entity: CntDevice) -> None:
+    entity.hass = hass
+    entity.async_on_remove = MagicMock()
+    await entity.async_added_to_hass()
+
+
+async def test_state_interval_goes_before_the_distance_gate(hass: HomeAssistant) -> None:
+    """An entity with a state interval writes once per interval, however far it moves."""
+    entity = LocationEntity(_coordinator(), state_interval=300)
+    await _async_add(hass, entity)
+
+    assert entity._location_throttle is None
+    assert entity._state_throttle.min_interval == 300
+    for _ in range(5):
+        entity.coordinator.data.latitude += 0.01
+        entity._handle_coordinator_update()
+    assert entity.writes == 1
+    entity._state_throttle.async_cancel()
+
+
+async def test_location_entity_without_interval_uses_distance(hass: HomeAssistant) -> None:
+    """Without a state interval the location throttle decides."""
+    entity = LocationEntity(_coordinator())
+    await _async_add(hass, entity)
+
+    assert entity._state_throttle is None
+    entity._handle_coordinator_update()
+    entity._handle_coordinator_update()
+    assert entity.writes == 1
+    assert entity._location_throttle.skipped == 1
+    entity._location_throttle.async_cancel()
@@ -0,0 +1,48 @@
+"""Tests of the Conneqtech options flow."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.conneqtech.const import CONF_GEOFENCES, CONF_TRIP_IDLE_TIME, DOMAIN
+
+HOME = {"name": "Home", "latitude": 52.0907, "longitude": 5.1214, "radius": "150"}
+
+
+async def _async_start(hass: HomeAssistant, options: dict | None = None) -> tuple[MockConfigEntry, dict]:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"client_id": "test", "client_secret": "secret", "device_id": "1"},
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    return entry, result
+
+
+async def test_invalid_geofences_show_an_error(hass: HomeAssistant) -> None:
+    """A geofence without a radius or polygon is refused."""
+    entry, result = await _async_start(hass)
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_GEOFENCES: [{"name": "Home", "latitude": 52.0}]})
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_GEOFENCES: "invalid_geofences"}
+    assert entry.options == {}
+
+
+async def test_valid_geofences_are_stored_validated(hass: HomeAssistant) -> None:
+    """Geofences are coerced and stored next to the existing options."""
+    entry, result = await _async_start(hass, {"unrelated": True})
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_GEOFENCES: HOME, CONF_TRIP_IDLE_TIME: 600})
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_GEOFENCES] == [{**HOME, "radius": 150.0}]
+    assert entry.options[CONF_TRIP_IDLE_TIME] == 600
+    assert entry.options["unrelated"] is True
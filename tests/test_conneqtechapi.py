@@ -0,0 +1,37 @@
+"""Tests of the Conneqtech API client against the local fake server."""
+
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_server import FakeConneqtech
+from custom_components.conneqtech.conneqtechapi import ConneqtechApi
+
+
+async def test_stream_end_is_left_to_the_caller(hass: HomeAssistant, socket_enabled) -> None:
+    """A stream the server closes returns instead of reconnecting inside the library."""
+    fake = FakeConneqtech(fleet_size=2, max_events=3)
+    server = TestServer(fake.app)
+    await server.start_server()
+    api = ConneqtechApi(hass, "test", "secret", None)
+    api.base_url = str(server.make_url("")).rstrip("/")
+    opened = []
+    received = []
+    event_ids = []
+
+    async with asyncio.timeout(5):
+        await api.async_connect(
+            fake.imeis,
+            lambda imei, changes: received.append(imei),
+            on_open=lambda: opened.append(True),
+            on_event=event_ids.append,
+        )
+    await server.close()
+
+    assert len(received) == 3
+    assert event_ids == ["1", "2", "3"]
+    assert opened == [True]
+    assert fake.requests == 1
@@ -0,0 +1,43 @@
+"""Tests of the stream event decoding."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock
+
+from custom_components.conneqtech.decode import ingest_event
+from custom_components.conneqtech.metrics import StreamMetrics
+
+CHANGES = {"payload_state.tracker.loc.sp": 12}
+
+
+def _event(**payload) -> str:
+    return json.dumps({"type": "updated", "changes": CHANGES, **payload})
+
+
+def test_event_is_credited_to_its_imei() -> None:
+    callback = MagicMock()
+    ingest_event(_event(imei=2), None, callback)
+    callback.assert_called_once_with("2", CHANGES)
+
+
+def test_event_without_imei_on_single_device_stream() -> None:
+    callback = MagicMock()
+    ingest_event(_event(), "1", callback)
+    callback.assert_called_once_with("1", CHANGES)
+
+
+def test_event_without_imei_on_shared_stream_is_dropped() -> None:
+    """It can't be told which device of the stream sent it."""
+    callback = MagicMock()
+    metrics = StreamMetrics()
+    ingest_event(_event(), None, callback, metrics)
+    callback.assert_not_called()
+    assert metrics.decode_errors == 1
+    assert metrics.events.total == 1
+
+
+def test_non_update_is_skipped() -> None:
+    callback = MagicMock()
+    ingest_event(json.dumps({"type": "heartbeat"}), "1", callback)
+    callback.assert_not_called()
@@ -0,0 +1,58 @@
+"""Tests of the diagnostics dump."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.conneqtech.const import DATA_STREAMS, DOMAIN
+from custom_components.conneqtech.device import ConneqtechDevice
+from custom_components.conneqtech.diagnostics import async_get_config_entry_diagnostics
+from custom_components.conneqtech.stream import ConneqtechStreamManager
+from custom_components.conneqtech.trip import Trip
+
+CLIENT_ID = "client-4711"
+CLIENT_SECRET = "secret-0815"
+IMEI = "358000000000042"
+START = datetime(2024, 5, 1, 17, 0, tzinfo=timezone.utc)
+
+
+async def test_diagnostics_hide_identity_and_whereabouts(hass: HomeAssistant) -> None:
+    """No credential, IMEI, position or geofence shows up in the dump."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"client_id": CLIENT_ID, "client_secret": CLIENT_SECRET, "device_id": IMEI},
+        options={"geofences": [
+            {"name": "Home", "latitude": 52.0911, "longitude": 5.1222, "radius": 100},
+        ]},
+    )
+    entry.add_to_hass(hass)
+
+    api = MagicMock(client_id=CLIENT_ID)
+    coordinator = MagicMock(api=api, stream_state="connected", update_mode="stream")
+    coordinator.data = ConneqtechDevice({
+        "imei": IMEI,
+        "payload_state": {"tracker": {"loc": {"lat": 52.0933, "lon": 5.1244}}},
+    })
+    coordinator.stats.as_dict.return_value = {}
+    manager = ConneqtechStreamManager(hass, api)
+    manager.async_add_device(IMEI, coordinator)
+    hass.data[DATA_STREAMS] = {CLIENT_ID: manager}
+
+    runtime_data = MagicMock(coordinator=coordinator, track=[], statistics=None)
+    runtime_data.trips.trip = Trip(START, 52.0955, 5.1266, START, 52.0977, 5.1288)
+    runtime_data.geofences.inside = frozenset({"Home"})
+    hass.data[DOMAIN] = {entry.entry_id: runtime_data}
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    dump = json.dumps(diagnostics, default=str)
+    manager.async_stop()
+
+    for secret in (CLIENT_ID, CLIENT_SECRET, IMEI, "Home",
+                   "52.09", "5.12"):
+        assert secret not in dump
+    assert diagnostics["device"]["trip"]["distance"] == 0.0
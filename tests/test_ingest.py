@@ -0,0 +1,47 @@
+"""Tests of the coalescing ingest queue."""
+
+from __future__ import annotations
+
+from custom_components.conneqtech.ingest import IngestQueue
+
+SPEED = "payload_state.tracker.loc.sp"
+COURSE = "payload_state.tracker.loc.ang"
+
+
+async def test_changes_of_a_device_are_coalesced() -> None:
+    """A newer value of a queued key replaces the older one and moves last."""
+    queue = IngestQueue(100)
+    queue.put("1", {SPEED: 10, COURSE: 90})
+    queue.put("1", {SPEED: 12})
+
+    assert queue.depth == 2
+    assert queue.enqueued == 3
+    assert queue.coalesced == 1
+    imei, batch = await queue.async_get()
+    assert imei == "1"
+    assert list(batch.items()) == [(COURSE, 90), (SPEED, 12)]
+    assert queue.depth == 0
+
+
+async def test_batches_come_out_in_arrival_order() -> None:
+    """A device keeps its place in the queue while changes are merged."""
+    queue = IngestQueue(100)
+    queue.put("1", {SPEED: 10})
+    queue.put("2", {SPEED: 20})
+    queue.put("1", {SPEED: 11})
+
+    assert (await queue.async_get())[0] == "1"
+    assert (await queue.async_get())[0] == "2"
+
+
+async def test_oldest_batches_are_dropped_when_full() -> None:
+    """Past max_keys the oldest devices are dropped, never the newest."""
+    queue = IngestQueue(2)
+    assert queue.put("1", {SPEED: 10}) == []
+    assert queue.put("2", {SPEED: 20}) == []
+    assert queue.put("3", {SPEED: 30, COURSE: 0}) == ["1", "2"]
+
+    assert queue.dropped == 2
+    assert queue.depth == 2
+    assert queue.max_depth == 2
+    assert await queue.async_get() == ("3", {SPEED: 30, COURSE: 0})
@@ -0,0 +1,131 @@
+"""Tests of the processors fed by the coordinator."""
+
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.conneqtech.const import (
+    EVENT_GEOFENCE_ENTER,
+    EVENT_GEOFENCE_EXIT,
+    KEY_BATTERY_DRAIN,
+    KEY_BATTERY_LEVEL,
+    KEY_COORDINATES,
+    KEY_GEOFENCE,
+    KEY_ODOMETER,
+)
+from custom_components.conneqtech.device import ConneqtechDevice
+from custom_components.conneqtech.drain import BatteryDrain
+from custom_components.conneqtech.geofence import (
+    GeofenceIndex,
+    GeofenceMonitor,
+    parse_geofences,
+)
+from custom_components.conneqtech.odometer import Odometer
+
+SPEED = "payload_state.tracker.loc.sp"
+RSSI = "payload_state.tracker.metric.rssi"
+
+
+def _device(latitude: float, longitude: float, speed: float = 0, level: int = 90) -> ConneqtechDevice:
+    return ConneqtechDevice({
+        "imei": "1",
+        "payload_state": {"tracker": {
+            "loc": {"geo": {"coordinates": [longitude, latitude]}, "sp": speed},
+            "metric": {"bbatp": level, "bbatv": 4.1},
+        }},
+    })
+
+
+def _move(device: ConneqtechDevice, latitude: float, longitude: float, speed: float = 15) -> dict:
+    changes = {KEY_COORDINATES: [longitude, latitude], SPEED: speed}
+    device.apply_changes(changes)
+    return changes
+
+
+async def test_odometer_adds_up_the_ride() -> None:
+    """Steps while riding count, jitter of a parked device does not."""
+    odometer = Odometer()
+    device = _device(52.0, 5.0)
+    assert odometer.async_process(device, None) == ()
+
+    assert odometer.async_process(device, _move(device, 52.001, 5.0)) == (KEY_ODOMETER,)
+    assert 110 < odometer.total < 112
+    # Parked, a few meters of GPS jitter.
+    assert odometer.async_process(device, _move(device, 52.00105, 5.0, 0)) == ()
+    # Other keys are not looked at.
+    assert odometer.async_process(device, {RSSI: -70}) == ()
+    assert 110 < odometer.total < 112
+
+
+async def test_odometer_survives_a_restart() -> None:
+    """The saved total and reference position are picked up again."""
+    odometer = Odometer()
+    device = _device(52.0, 5.0)
+    odometer.async_process(device, None)
+    odometer.async_process(device, _move(device, 52.001, 5.0))
+    # Stored as JSON, the position comes back as a list.
+    saved = json.loads(json.dumps(odometer.as_dict()))
+
+    restored = Odometer()
+    restored.restore(saved)
+    assert restored.as_dict() == odometer.as_dict()
+    restored.async_process(device, _move(device, 52.002, 5.0))
+    assert 221 < restored.total < 224
+
+    empty = Odometer()
+    empty.restore(None)
+    assert empty.total == 0
+
+
+async def test_battery_drain_rate(hass: HomeAssistant, freezer) -> None:
+    """The rate is the drain per hour once the window spans enough time."""
+    drain = BatteryDrain()
+    device = _device(52.0, 5.0, level=90)
+    assert drain.async_process(device, None) == (KEY_BATTERY_DRAIN,)
+    assert drain.rate is None
+
+    for level in (89, 88, 87):
+        freezer.tick(timedelta(minutes=30))
+        device.apply_changes({KEY_BATTERY_LEVEL: level})
+        assert drain.async_process(device, {KEY_BATTERY_LEVEL: level}) == (KEY_BATTERY_DRAIN,)
+    assert round(drain.rate, 3) == 2.0
+    # Unrelated changes are skipped.
+    assert drain.async_process(device, {RSSI: -70}) == ()
+
+    restored = BatteryDrain()
+    restored.restore(json.loads(json.dumps(drain.as_dict())))
+    assert round(restored.rate, 3) == 2.0
+
+    # Charging starts the window over.
+    freezer.tick(timedelta(minutes=30))
+    device.apply_changes({KEY_BATTERY_LEVEL: 100})
+    drain.async_process(device, {KEY_BATTERY_LEVEL: 100})
+    assert drain.rate is None
+
+
+async def test_geofence_enter_and_exit(hass: HomeAssistant) -> None:
+    """Crossing a geofence fires an event, the first position does not."""
+    enter = async_capture_events(hass, EVENT_GEOFENCE_ENTER)
+    exit_ = async_capture_events(hass, EVENT_GEOFENCE_EXIT)
+    index = GeofenceIndex(parse_geofences([
+        {"name": "Home", "latitude": 52.0, "longitude": 5.0, "radius": 100},
+        {"name": "Work", "polygon": [[52.01, 5.01], [52.01, 5.02], [52.02, 5.02], [52.02, 5.01]]},
+    ]))
+    monitor = GeofenceMonitor(hass, "1", index)
+    device = _device(52.0, 5.0)
+
+    assert monitor.async_process(device, None) == (KEY_GEOFENCE,)
+    assert monitor.inside == {"Home"}
+    assert monitor.async_process(device, {RSSI: -70}) == ()
+    assert monitor.async_process(device, _move(device, 52.015, 5.015)) == (KEY_GEOFENCE,)
+    # Still inside, nothing changes.
+    assert monitor.async_process(device, _move(device, 52.016, 5.016)) == ()
+    await hass.async_block_till_done()
+
+    assert monitor.inside == {"Work"}
+    assert [event.data for event in exit_] == [{"imei": "1", "geofence": "Home"}]
+    assert [event.data for event in enter] == [{"imei": "1", "geofence": "Work"}]
@@ -0,0 +1,49 @@
+"""Tests of the recording and replay of stream traffic."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.conneqtech.device import ConneqtechDevice
+from custom_components.conneqtech.stream import ConneqtechStreamManager
+
+SPEED = "payload_state.tracker.loc.sp"
+
+
+def _write_recording(path: Path, events: list[tuple[str, dict]]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for index, (imei, changes) in enumerate(events):
+            data = json.dumps({"type": "updated", "imei": imei, "changes": changes})
+            file.write(json.dumps([1000.0 + index, str(index), imei, data]) + "\n")
+
+
+async def test_replay_does_not_touch_live_devices(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Replayed events go to copies of the devices, not the coordinators."""
+    path = tmp_path / "recording.jsonl.gz"
+    _write_recording(path, [
+        ("1", {SPEED: 10}),
+        ("1", {SPEED: 20}),
+        ("2", {SPEED: 30}),
+    ])
+    manager = ConneqtechStreamManager(hass, MagicMock(client_id="test"))
+    coordinator = MagicMock()
+    coordinator.data = ConneqtechDevice({
+        "imei": "1",
+        "payload_state": {"tracker": {"loc": {"sp": 5}}},
+    })
+    manager.async_add_device("1", coordinator)
+
+    sink = await manager.async_replay(str(path), 0)
+
+    coordinator.update_data.assert_not_called()
+    assert coordinator.data.speed == 5
+    assert sink.metrics.events.total == 3
+    assert sink.devices["1"].speed == 20
+    assert sink.devices["2"].speed == 30
+    assert sink.queue.depth == 0
+    manager.async_stop()
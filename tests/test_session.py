@@ -0,0 +1,41 @@
+"""Tests of the shared HTTP session."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.conneqtech.const import DATA_SESSION
+from custom_components.conneqtech.session import (
+    async_acquire_session,
+    async_release_session,
+)
+
+
+async def test_session_is_closed_by_the_last_user(hass: HomeAssistant) -> None:
+    """Entries share one session, it stays open until all released it."""
+    first = async_acquire_session(hass)
+    second = async_acquire_session(hass)
+    assert first is second
+    assert hass.data[DATA_SESSION].users == 2
+
+    await async_release_session(hass)
+    assert not first.closed
+
+    await async_release_session(hass)
+    assert first.closed
+    assert DATA_SESSION not in hass.data
+
+    # The next entry gets a new session.
+    third = async_acquire_session(hass)
+    assert third is not first
+    await async_release_session(hass)
+
+
+async def test_session_is_closed_with_home_assistant(hass: HomeAssistant) -> None:
+    """A session still in use is closed when Home Assistant stops."""
+    session = async_acquire_session(hass)
+
+    await hass.async_stop(force=True)
+
+    assert session.closed
+    assert DATA_SESSION not in hass.data
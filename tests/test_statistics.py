@@ -0,0 +1,94 @@
+"""Tests of the long-term statistics aggregation."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.statistics import (
+    get_metadata,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.conneqtech.statistics import (
+    StatisticMeanType,
+    StatisticsAggregator,
+    statistic_metadata,
+)
+
+SPEED = "payload_state.tracker.loc.sp"
+
+
+async def test_steady_value_is_held_until_it_changes(hass: HomeAssistant, freezer: FrozenDateTimeFactory) -> None:
+    """Unchanged values are not resent, the last one counts until a change."""
+    freezer.move_to("2024-05-01T10:00:00+00:00")
+    statistics = StatisticsAggregator(hass, "1")
+    statistics.async_process(None, {SPEED: 0})
+    freezer.move_to("2024-05-01T10:50:00+00:00")
+    statistics.async_process(None, {SPEED: 30})
+    freezer.move_to("2024-05-01T11:00:00+00:00")
+
+    with patch(
+        "custom_components.conneqtech.statistics.async_add_external_statistics"
+    ) as add_statistics:
+        statistics._async_flush()
+
+    add_statistics.assert_called_once()
+    metadata, rows = add_statistics.call_args.args[1:]
+    assert metadata["statistic_id"] == "conneqtech:1_speed"
+    assert len(rows) == 1
+    assert rows[0]["start"].isoformat() == "2024-05-01T10:00:00+00:00"
+    assert rows[0]["mean"] == 5.0
+    assert rows[0]["min"] == 0
+    assert rows[0]["max"] == 30
+
+    buckets = statistics.as_dict()["buckets"]["speed"]
+    assert len(buckets) == 12
+    assert [bucket["mean"] for bucket in buckets[-3:]] == [0, 30, 30]
+    assert statistics.imported == 1
+
+
+def test_metadata_has_no_deprecated_mean_flag() -> None:
+    """Current Home Assistant versions get a mean type instead of has_mean."""
+    metadata = statistic_metadata("conneqtech:1_speed", "1 Speed", "km/h", "speed")
+    if StatisticMeanType is None:
+        assert metadata["has_mean"] is True
+    else:
+        assert "has_mean" not in metadata
+        assert metadata["mean_type"] is StatisticMeanType.ARITHMETIC
+
+
+async def test_rows_pass_recorder_validation(recorder_mock: Recorder, hass: HomeAssistant, freezer: FrozenDateTimeFactory) -> None:
+    """The recorder accepts and stores the imported metadata and rows."""
+    freezer.move_to("2024-05-01T10:00:00+00:00")
+    statistics = StatisticsAggregator(hass, "1")
+    statistics.async_process(None, {SPEED: 10})
+    freezer.move_to("2024-05-01T10:30:00+00:00")
+    statistics.async_process(None, {SPEED: 20})
+    freezer.move_to("2024-05-01T11:00:00+00:00")
+    statistics._async_flush()
+    await async_wait_recording_done(hass)
+
+    statistic_id = "conneqtech:1_speed"
+    metadata = await recorder_mock.async_add_executor_job(
+        lambda: get_metadata(hass, statistic_ids={statistic_id}))
+    _, stored = metadata[statistic_id]
+    assert stored["source"] == "conneqtech"
+    assert stored["unit_of_measurement"] == "km/h"
+    if StatisticMeanType is not None:
+        assert stored["mean_type"] is StatisticMeanType.ARITHMETIC
+
+    rows = await recorder_mock.async_add_executor_job(
+        statistics_during_period, hass,
+        datetime.fromisoformat("2024-05-01T10:00:00+00:00"), None,
+        {statistic_id}, "hour", None, {"mean", "min", "max"})
+    assert len(rows[statistic_id]) == 1
+    assert rows[statistic_id][0]["mean"] == 15.0
+    assert rows[statistic_id][0]["min"] == 10
+    assert rows[statistic_id][0]["max"] == 20
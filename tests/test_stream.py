@@ -0,0 +1,95 @@
+"""Tests of the account event stream."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.conneqtech.const import STREAM_IDLE_TIMEOUT, STREAM_MAX_IMEIS
+from custom_components.conneqtech.stream import ConneqtechStreamManager, StreamShard
+
+
+async def _async_wait_for(mock: MagicMock) -> None:
+    for _ in range(100):
+        if mock.called:
+            return
+        await asyncio.sleep(0)
+
+
+async def test_consumer_survives_failing_dispatch(hass: HomeAssistant, caplog) -> None:
+    """A raising coordinator must not stop the ingest of other devices."""
+    manager = ConneqtechStreamManager(hass, MagicMock(client_id="test"))
+    failing, working = MagicMock(), MagicMock()
+    failing.update_data.side_effect = TypeError("can't compare datetimes")
+    manager.async_add_device("1", failing)
+    manager.async_add_device("2", working)
+
+    manager.async_enqueue("1", {"payload_state.tracker.loc.sp": 12})
+    await _async_wait_for(failing.update_data)
+    manager.async_enqueue("2", {"payload_state.tracker.loc.sp": 20})
+    await _async_wait_for(working.update_data)
+
+    working.update_data.assert_called_once_with(
+        {"payload_state.tracker.loc.sp": 20})
+    assert not manager._consumer.done()
+    assert "Error handling the changes of 1" in caplog.text
+    assert manager.queue.depth == 0
+
+    manager.async_stop()
+
+
+async def test_devices_are_split_over_shards(hass: HomeAssistant) -> None:
+    """A shard carries at most STREAM_MAX_IMEIS devices, freed room is reused."""
+    manager = ConneqtechStreamManager(hass, MagicMock(client_id="test"))
+    removers = {
+        str(imei): manager.async_add_device(str(imei), MagicMock())
+        for imei in range(STREAM_MAX_IMEIS + 1)
+    }
+
+    assert [len(shard.imeis) for shard in manager._shards] == [STREAM_MAX_IMEIS, 1]
+    assert manager._shards[1].imeis == {str(STREAM_MAX_IMEIS)}
+
+    removers["0"]()
+    manager.async_add_device("new", MagicMock())
+    assert "new" in manager._shards[0].imeis
+    assert len(manager._shards) == 2
+    manager.async_stop()
+
+
+@pytest.mark.parametrize(
+    ("event_id", "error", "closed_after", "backfilled"),
+    [
+        # The routine reconnect after the idle timeout, with or without ids.
+        (None, TimeoutError(), STREAM_IDLE_TIMEOUT, False),
+        ("41", TimeoutError(), STREAM_IDLE_TIMEOUT, False),
+        # Closed by the server while events were flowing.
+        (None, None, 10, False),
+        # Dropped long after the last event, what came since may be lost.
+        (None, ConnectionResetError(), STREAM_IDLE_TIMEOUT - 1, True),
+        ("41", ConnectionResetError(), STREAM_IDLE_TIMEOUT - 1, True),
+        # Dropped right after the last event.
+        (None, ConnectionResetError(), 5, False),
+    ],
+)
+async def test_backfill_only_after_a_long_gap(
+        hass: HomeAssistant, event_id, error, closed_after, backfilled) -> None:
+    """Reconnects backfill only when events may have been missed for long."""
+    manager = ConneqtechStreamManager(hass, MagicMock(client_id="test"))
+    manager.async_backfill = MagicMock()
+    shard = StreamShard(manager, 0)
+    with patch("custom_components.conneqtech.stream.time") as mock_time:
+        mock_time.monotonic.return_value = 1000
+        shard._async_opened(["1"])
+        mock_time.monotonic.return_value = 1010
+        shard._async_event_received(event_id)
+        mock_time.monotonic.return_value = 1010 + closed_after
+        shard._async_mark_closed(error)
+        mock_time.monotonic.return_value = 1012 + closed_after
+        shard._async_opened(["1"])
+
+    assert manager.async_backfill.called is backfilled
+    assert shard.last_event_at == 1010
+    assert shard.last_event_id == event_id
@@ -0,0 +1,93 @@
+"""Tests of the trip detection."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.conneqtech.device import ConneqtechDevice
+from custom_components.conneqtech.const import EVENT_TRIP_ENDED
+from custom_components.conneqtech.trip import TripDetector
+
+
+def _fix(when: str, latitude: float, longitude: float, speed: float) -> ConneqtechDevice:
+    return ConneqtechDevice({"payload_state": {"tracker": {"loc": {
+        "dtg": when,
+        "sp": speed,
+        "geo": {"coordinates": [longitude, latitude]},
+    }}}})
+
+
+async def test_trip_starts_at_recent_fix(hass: HomeAssistant) -> None:
+    """A device that left right after its last fix left from there."""
+    trips = TripDetector(hass, "1", 5, 300, MagicMock())
+    trips.async_update(_fix("2024-05-01T16:59:30+00:00", 52.0, 5.0, 0))
+    trips.async_update(_fix("2024-05-01T17:00:00+00:00", 52.001, 5.0, 20))
+
+    assert trips.current.start.isoformat() == "2024-05-01T16:59:30+00:00"
+    assert trips.current.start_latitude == 52.0
+    assert trips.current.distance > 100
+    trips.async_cancel()
+
+
+async def test_trip_ignores_fix_before_parking(hass: HomeAssistant) -> None:
+    """A fix from long before the ride is no part of the trip."""
+    trips = TripDetector(hass, "1", 5, 900, MagicMock())
+    trips.async_update(_fix("2024-05-01T08:00:00+00:00", 52.0, 5.0, 0))
+    trips.async_update(_fix("2024-05-01T17:00:00+00:00", 52.001, 5.0, 20))
+    trips.async_update(_fix("2024-05-01T17:10:00+00:00", 52.03, 5.0, 20))
+
+    trip = trips.current
+    assert trip.start.isoformat() == "2024-05-01T17:00:00+00:00"
+    assert trip.start_latitude == 52.001
+    assert trip.duration == 600
+    assert 15 < trip.average_speed < 20
+    trips.async_cancel()
+
+
+async def test_gap_while_moving_ends_the_trip(hass: HomeAssistant) -> None:
+    """A ride the next day is no part of a trip whose feed went quiet."""
+    ended = async_capture_events(hass, EVENT_TRIP_ENDED)
+    trips = TripDetector(hass, "1", 5, 300, MagicMock())
+    trips.async_update(_fix("2024-05-01T17:00:00+00:00", 52.0, 5.0, 20))
+    trips.async_update(_fix("2024-05-01T17:04:00+00:00", 52.01, 5.0, 20))
+    assert trips.async_update(_fix("2024-05-02T08:00:00+00:00", 52.011, 5.0, 20))
+    await hass.async_block_till_done()
+
+    assert len(ended) == 1
+    assert ended[0].data["start"] == "2024-05-01T17:00:00+00:00"
+    assert ended[0].data["end"] == "2024-05-01T17:04:00+00:00"
+    assert trips.current.start.isoformat() == "2024-05-02T08:00:00+00:00"
+    assert trips.current.distance == 0
+    trips.async_cancel()
+
+
+async def test_quiet_device_ends_the_trip_by_timer(hass: HomeAssistant, freezer: FrozenDateTimeFactory) -> None:
+    """The idle timer runs from the last fix, also while moving."""
+    ended = async_capture_events(hass, EVENT_TRIP_ENDED)
+    publish = MagicMock()
+    trips = TripDetector(hass, "1", 5, 300, publish)
+    trips.async_update(_fix("2024-05-01T17:00:00+00:00", 52.0, 5.0, 20))
+    freezer.tick(200)
+    trips.async_update(_fix("2024-05-01T17:03:20+00:00", 52.01, 5.0, 20))
+
+    freezer.tick(200)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert trips.current is not None
+
+    freezer.tick(101)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert trips.current is None
+    assert len(ended) == 1
+    assert ended[0].data["end"] == "2024-05-01T17:03:20+00:00"
+    publish.assert_called_once()